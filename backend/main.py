@@ -1,16 +1,25 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional, Dict, Any, Tuple
 import uvicorn
 from dotenv import load_dotenv
+from cachetools import LRUCache, TTLCache
+from sqlalchemy import func
+from datetime import datetime, timezone
+import asyncio
+import logging
 import os 
+import re
+import sys
 
 from models.database import get_db
 from models.user_interactions import UserInteraction
 from models.track_features import TrackFeatures
 from models.user_profiles import UserProfile
-from services.ml_service import MLService
 from services.spotify_service import SpotifyService
 from services.deezer_service import DeezerService
 from services.auth_service import AuthService
@@ -19,7 +28,47 @@ from services.ai_music_service import AIMusicService
 # Load environment variables from parent directory
 load_dotenv(dotenv_path="../.env")
 
-app = FastAPI(title="Lyrafy ML Backend", version="1.0.0")
+logger = logging.getLogger(__name__)
+
+def _kernel_supports_io_uring() -> bool:
+    """Check that the running Linux kernel is new enough (5.11+) for uringcore"""
+    match = re.match(r"(\d+)\.(\d+)", os.uname().release)
+    return bool(match) and (int(match.group(1)), int(match.group(2))) >= (5, 11)
+
+def uringcore_loop_factory() -> asyncio.AbstractEventLoop:
+    """uvicorn (>=0.36) custom loop factory: build a uringcore loop directly instead of via the global policy"""
+    import uringcore
+    return uringcore.EventLoopPolicy().new_event_loop()
+
+# Use the io_uring-backed event loop on Linux, falling back to uvloop/asyncio
+EVENT_LOOP = "auto"
+if sys.platform == "linux" and _kernel_supports_io_uring():
+    try:
+        import uringcore
+        EVENT_LOOP = "main:uringcore_loop_factory"
+    except ImportError:
+        pass
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own the background interaction writer for the app's lifetime"""
+    await start_interaction_flusher()
+    try:
+        yield
+    finally:
+        await stop_interaction_flusher()
+
+app = FastAPI(title="Lyrafy ML Backend", version="1.0.0", default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Added before CORS so it runs inside it and error responses still get CORS headers
+@app.middleware("http")
+async def handle_unexpected_error(request: Request, call_next):
+    """Log any unhandled endpoint error and report a generic 500; HTTPExceptions keep their own status"""
+    try:
+        return await call_next(request)
+    except Exception:
+        logger.exception("Unhandled error on %s", request.url.path)
+        return ORJSONResponse(status_code=500, content={"detail": "Internal server error"})
 
 # CORS middleware for React Native
 app.add_middleware(
@@ -30,17 +79,222 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON payloads (recommendations, track lists) for mobile clients
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, quality=4, minimum_size=1024)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Initialize services
-ml_service = MLService()
+# Built on first use so processes that never serve an ML endpoint never load TensorFlow
+ml_service_task: Optional[asyncio.Task] = None
+ml_service_failed = False
+
+def build_ml_service():
+    """Import and build the ML service; importing it pulls in TensorFlow and scikit-learn"""
+    from services.ml_service import MLService
+    return MLService()
+
+def load_ml_service() -> asyncio.Task:
+    """Start building the ML service in a worker thread, once, so the event loop never blocks on it"""
+    global ml_service_task
+    if ml_service_task is None:
+        ml_service_task = asyncio.create_task(asyncio.to_thread(build_ml_service))
+        ml_service_task.add_done_callback(record_ml_service_result)
+    return ml_service_task
+
+def record_ml_service_result(task: asyncio.Task):
+    """Forget a failed build so the next request retries it"""
+    global ml_service_task, ml_service_failed
+    ml_service_failed = task.cancelled() or task.exception() is not None
+    if ml_service_failed:
+        logger.error("Failed to load the ML service", exc_info=None if task.cancelled() else task.exception())
+        ml_service_task = None
+
+def ml_service_status() -> str:
+    """Load state of the ML service for /health"""
+    if ml_service_task is not None:
+        return "active" if ml_service_task.done() else "loading"
+    return "error" if ml_service_failed else "not loaded"
+
+async def get_ml_service():
+    """Return the ML service, waiting for it to finish loading if needed"""
+    return await asyncio.shield(load_ml_service())
+
 spotify_service = SpotifyService()
 deezer_service = DeezerService()
 auth_service = AuthService()
 ai_music_service = AIMusicService()
 
+# Profile cache keyed by (kind, user_id); the LRU keeps the last good copy as a
+# failover if a fresh load fails. Entries are invalidated wherever a profile changes:
+# analyze-taste, retrain, and each interaction batch once it has been learned from.
+# Swipes still waiting in the queue (normally well under a second) are not reflected yet.
+profile_cache = TTLCache(maxsize=50_000, ttl=300)
+stale_profile_cache = LRUCache(maxsize=50_000)
+
+async def get_cached_profile(kind: str, user_id: str, load):
+    """Return a cached profile, loading it on a miss and serving a stale copy on load errors"""
+    key = (kind, user_id)
+    if key in profile_cache:
+        return profile_cache[key]
+    try:
+        profile = await load(user_id)
+    except Exception:
+        if key in stale_profile_cache:
+            return stale_profile_cache[key]
+        raise
+    profile_cache[key] = stale_profile_cache[key] = profile
+    return profile
+
+def invalidate_profile(user_id: str):
+    """Drop a user's cached profiles after their data changes"""
+    for kind in ("ml", "taste"):
+        profile_cache.pop((kind, user_id), None)
+
+# Audio features are stable per track, so share them across requests
+AUDIO_FEATURES_BATCH_SIZE = 100  # Spotify's per-request ID limit
+audio_features_cache = TTLCache(maxsize=100_000, ttl=3600)
+audio_features_semaphore = asyncio.Semaphore(10)
+
+async def fetch_audio_features_batch(track_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """Fetch one batch of audio features, bounded to respect Spotify rate limits"""
+    async with audio_features_semaphore:
+        return await spotify_service.get_audio_features(track_ids)
+
+# Identical requests already being computed share one task instead of repeating the work
+inflight_requests: Dict[tuple, asyncio.Task] = {}
+
+async def single_flight(key: tuple, load):
+    """Run load() once per key at a time; concurrent callers with the same key await the same result"""
+    task = inflight_requests.get(key)
+    if task is None:
+        task = inflight_requests[key] = asyncio.create_task(load())
+        task.add_done_callback(lambda _: inflight_requests.pop(key, None))
+    # Shielded so one caller disconnecting does not cancel the others
+    return await asyncio.shield(task)
+
+# Search results are shared across users; vibe searches repeat the same queries
+search_cache = TTLCache(maxsize=10_000, ttl=300)
+
+# Interactions are queued by /record-interaction and written in batches; None in the
+# queue tells the flusher to drain what is left and stop
+INTERACTION_BATCH_SIZE = 500
+INTERACTION_WRITE_ATTEMPTS = 5
+MIN_INTERACTIONS_FOR_RETRAIN = 10
+interaction_queue: asyncio.Queue = asyncio.Queue()
+interaction_flusher_task: Optional[asyncio.Task] = None
+
+def write_interactions(batch: List[Dict[str, Any]]):
+    """Insert a batch of interactions in a single transaction"""
+    db = next(get_db())
+    try:
+        # Built through the model so a field it does not map fails loudly instead of being dropped
+        db.bulk_save_objects([UserInteraction(**interaction) for interaction in batch])
+        db.commit()
+    finally:
+        db.close()
+
+def count_interactions(user_id: str) -> int:
+    """Count a user's stored interactions in the database without loading the rows"""
+    db = next(get_db())
+    try:
+        return db.query(func.count(UserInteraction.id)).filter(UserInteraction.user_id == user_id).scalar()
+    finally:
+        db.close()
+
+def take_interaction_batch(first: Optional[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], bool]:
+    """Pull up to INTERACTION_BATCH_SIZE queued interactions without waiting; also report whether the stop marker was reached"""
+    batch: List[Dict[str, Any]] = []
+    interaction = first
+    while interaction is not None:
+        batch.append(interaction)
+        if len(batch) == INTERACTION_BATCH_SIZE or interaction_queue.empty():
+            return batch, False
+        interaction = interaction_queue.get_nowait()
+    return batch, True
+
+async def write_interactions_with_retry(batch: List[Dict[str, Any]]) -> bool:
+    """Write a batch, retrying with exponential backoff while the database is failing"""
+    for attempt in range(INTERACTION_WRITE_ATTEMPTS):
+        try:
+            await asyncio.to_thread(write_interactions, batch)
+            return True
+        except Exception:
+            logger.exception("Failed to write %d interactions (attempt %d/%d)", len(batch), attempt + 1, INTERACTION_WRITE_ATTEMPTS)
+            if attempt + 1 < INTERACTION_WRITE_ATTEMPTS:
+                await asyncio.sleep(2 ** attempt)
+    logger.error("Dropping %d interactions after %d failed writes", len(batch), INTERACTION_WRITE_ATTEMPTS)
+    return False
+
+async def learn_from_interactions(batch: List[Dict[str, Any]]):
+    """Run MLService's per-interaction profile update, then its retrain check once per user"""
+    user_ids = list(dict.fromkeys(interaction["user_id"] for interaction in batch))
+    try:
+        ml_service = await get_ml_service()
+        for interaction in batch:
+            await ml_service._update_profile_from_interaction(
+                interaction["user_id"], interaction["track_id"], interaction["action"]
+            )
+        for user_id in user_ids:
+            await ml_service._check_and_retrain_model(user_id)
+    except Exception:
+        logger.exception("Failed to update profiles from %d interactions", len(batch))
+    finally:
+        # Profiles may have changed even if a later step failed
+        for user_id in user_ids:
+            invalidate_profile(user_id)
+
+async def flush_interactions_forever():
+    """Background task writing queued interactions as they arrive, until it reads the stop marker"""
+    while True:
+        batch, stopping = take_interaction_batch(await interaction_queue.get())
+        if batch and await write_interactions_with_retry(batch):
+            await learn_from_interactions(batch)
+        if stopping:
+            return
+
+async def start_interaction_flusher():
+    """Start the background interaction writer"""
+    global interaction_flusher_task
+    interaction_flusher_task = asyncio.create_task(flush_interactions_forever())
+
+async def stop_interaction_flusher():
+    """Let the writer drain everything queued, with its usual retries, then stop"""
+    if interaction_flusher_task:
+        await interaction_queue.put(None)
+        await interaction_flusher_task
+
 # Pydantic models for API requests/responses
+# Track models only declare the fields the services read; anything else Spotify
+# sends is kept as an extra so the services still see the full track dict
+class Artist(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    id: Optional[str] = None
+    name: str
+
+class Album(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    id: Optional[str] = None
+    name: Optional[str] = None
+    release_date: Optional[str] = None
+
+class Track(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    id: Optional[str] = None  # null for local and unavailable tracks
+    name: str
+    artists: List[Artist] = []
+    album: Optional[Album] = None
+    popularity: int = 0
+
 class TrackAnalysisRequest(BaseModel):
     user_id: str
-    top_tracks: List[Dict[str, Any]]
+    top_tracks: List[Track]
+
+    def track_dicts(self) -> List[Dict[str, Any]]:
+        """Plain dicts for the services, which index tracks by key; only fields the client sent"""
+        return [track.model_dump(exclude_unset=True) for track in self.top_tracks]
 
 class RecommendationRequest(BaseModel):
     user_id: str
@@ -66,65 +320,64 @@ async def root():
 @app.post("/analyze-taste")
 async def analyze_taste(request: TrackAnalysisRequest):
     """Analyze user's music taste from top tracks and create initial profile"""
-    try:
-        # Extract track features
-        track_features = await spotify_service.get_track_features(request.top_tracks)
-        
-        # Create user profile using ML
-        profile = await ml_service.create_user_profile(
-            user_id=request.user_id,
-            top_tracks=request.top_tracks,
-            track_features=track_features
-        )
-        
-        return {
-            "user_id": request.user_id,
-            "profile_created": True,
-            "preferences": profile.preferences,
-            "confidence": profile.confidence
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    top_tracks = request.track_dicts()
+
+    # Extract track features
+    track_features = await spotify_service.get_track_features(top_tracks)
+    
+    # Create user profile using ML
+    ml_service = await get_ml_service()
+    profile = await ml_service.create_user_profile(
+        user_id=request.user_id,
+        top_tracks=top_tracks,
+        track_features=track_features
+    )
+    invalidate_profile(request.user_id)
+    
+    return {
+        "user_id": request.user_id,
+        "profile_created": True,
+        "preferences": profile.preferences,
+        "confidence": profile.confidence
+    }
 
 @app.post("/get-recommendations", response_model=RecommendationResponse)
 async def get_recommendations(request: RecommendationRequest):
     """Get ML-powered music recommendations for a user"""
-    try:
-        recommendations = await ml_service.get_recommendations(
-            user_id=request.user_id,
-            vibe_mode=request.vibe_mode,
-            limit=request.limit,
-            exclude_track_ids=request.exclude_track_ids
-        )
-        
-        return RecommendationResponse(
-            recommendations=recommendations["tracks"],
-            confidence_scores=recommendations["confidence_scores"],
-            reasons=recommendations["reasons"]
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    key = ("recommendations", request.user_id, request.vibe_mode, request.limit, tuple(sorted(request.exclude_track_ids)))
+    ml_service = await get_ml_service()
+    recommendations = await single_flight(key, lambda: ml_service.get_recommendations(
+        user_id=request.user_id,
+        vibe_mode=request.vibe_mode,
+        limit=request.limit,
+        exclude_track_ids=request.exclude_track_ids
+    ))
+    
+    # Returned directly so orjson serializes NumPy scores without a Pydantic pass
+    return ORJSONResponse({
+        "recommendations": recommendations["tracks"],
+        "confidence_scores": recommendations["confidence_scores"],
+        "reasons": recommendations["reasons"]
+    })
 
 @app.post("/record-interaction")
 async def record_interaction(request: InteractionRequest):
     """Record user interaction (like/dislike/skip) for learning"""
-    try:
-        await ml_service.record_interaction(
-            user_id=request.user_id,
-            track_id=request.track_id,
-            action=request.action,
-            timestamp=request.timestamp
-        )
-        
-        return {"status": "success", "message": "Interaction recorded"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    await interaction_queue.put({
+        "user_id": request.user_id,
+        "track_id": request.track_id,
+        "action": request.action,
+        "timestamp": datetime.fromtimestamp(request.timestamp, tz=timezone.utc) if request.timestamp else datetime.now(timezone.utc)
+    })
+    
+    return {"status": "queued", "message": "Interaction queued"}
 
 @app.get("/user-profile/{user_id}")
 async def get_user_profile(user_id: str):
     """Get user's current ML profile"""
+    ml_service = await get_ml_service()
     try:
-        profile = await ml_service.get_user_profile(user_id)
+        profile = await get_cached_profile("ml", user_id, ml_service.get_user_profile)
         return profile
     except Exception as e:
         raise HTTPException(status_code=404, detail="User profile not found")
@@ -132,406 +385,287 @@ async def get_user_profile(user_id: str):
 @app.post("/retrain-model/{user_id}")
 async def retrain_user_model(user_id: str):
     """Retrain ML model for a specific user with new interaction data"""
-    try:
-        success = await ml_service.retrain_user_model(user_id)
-        return {"status": "success", "retrained": success}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Too little data to train on; skip loading the interaction rows
+    if await asyncio.to_thread(count_interactions, user_id) < MIN_INTERACTIONS_FOR_RETRAIN:
+        return {"status": "success", "retrained": False}
+
+    ml_service = await get_ml_service()
+    success = await ml_service.retrain_user_model(user_id)
+    invalidate_profile(user_id)
+    return {"status": "success", "retrained": success}
 
 # Spotify API endpoints
 @app.post("/spotify/auth-url")
 async def get_spotify_auth_url():
     """Get Spotify OAuth URL"""
-    try:
-        auth_url = await auth_service.get_spotify_auth_url()
-        return {"auth_url": auth_url}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    auth_url = await auth_service.get_spotify_auth_url()
+    return {"auth_url": auth_url}
 
 @app.post("/spotify/exchange-code")
 async def exchange_spotify_code(request: dict):
     """Exchange authorization code for access token"""
-    try:
-        result = await auth_service.exchange_code_for_token(request["code"])
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.get("/spotify/user-top-tracks")
-async def get_user_top_tracks(time_range: str = "medium_term", limit: int = 50):
-    """Get user's top tracks"""
-    try:
-        tracks = await spotify_service.get_user_top_tracks(time_range, limit)
-        return {"tracks": tracks}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await auth_service.exchange_code_for_token(request["code"])
+    return result
 
 @app.get("/spotify/search")
 async def search_spotify_tracks(query: str, limit: int = 20):
     """Search for tracks on Spotify"""
-    try:
+    key = (query, limit)
+    tracks = search_cache.get(key)
+    if tracks is None:
         tracks = await spotify_service.search_tracks(query, limit)
-        return {"tracks": tracks}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        # The service returns [] on failure; don't pin a transient error for every user
+        if tracks:
+            search_cache[key] = tracks
+    return {"tracks": tracks}
 
 @app.post("/spotify/recommendations-for-vibe")
 async def get_recommendations_for_vibe(request: dict):
     """Get tracks for a vibe mode using search"""
-    try:
-        vibe_mode = request.get("vibe_mode", "")
-        user_top_tracks = request.get("user_top_tracks", [])
-        tracks = await spotify_service.get_recommendations_for_vibe_mode(vibe_mode, user_top_tracks)
-        return {"tracks": tracks}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    vibe_mode = request.get("vibe_mode", "")
+    user_top_tracks = request.get("user_top_tracks", [])
+    tracks = await spotify_service.get_recommendations_for_vibe_mode(vibe_mode, user_top_tracks)
+    return {"tracks": tracks}
 
 @app.get("/spotify/playlists")
 async def get_user_playlists(access_token: str, limit: int = 50):
     """Get user's playlists"""
-    try:
-        playlists = await spotify_service.get_user_playlists(access_token, limit)
-        return {"playlists": playlists}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    playlists = await spotify_service.get_user_playlists(access_token, limit)
+    return {"playlists": playlists}
 
 @app.get("/spotify/playlist/{playlist_id}/tracks")
 async def get_playlist_tracks(playlist_id: str, access_token: str):
     """Get tracks from a playlist"""
-    try:
-        tracks = await spotify_service.get_playlist_tracks(access_token, playlist_id)
-        return {"tracks": tracks}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    tracks = await spotify_service.get_playlist_tracks(access_token, playlist_id)
+    return {"tracks": tracks}
 
 @app.post("/spotify/like-track")
 async def like_track(request: dict):
     """Like a track on Spotify"""
-    try:
-        track_id = request.get("track_id")
-        access_token = request.get("access_token")
+    track_id = request.get("track_id")
+    access_token = request.get("access_token")
+    
+    if not track_id:
+        raise HTTPException(status_code=400, detail="track_id is required")
+    if not access_token:
+        raise HTTPException(status_code=400, detail="access_token is required")
         
-        if not track_id:
-            raise HTTPException(status_code=400, detail="track_id is required")
-        if not access_token:
-            raise HTTPException(status_code=400, detail="access_token is required")
-            
-        result = await spotify_service.like_track(track_id, access_token)
-        return {"success": result}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await spotify_service.like_track(track_id, access_token)
+    return {"success": result}
 
 @app.post("/spotify/unlike-track")
 async def unlike_track(request: dict):
     """Unlike a track on Spotify"""
-    try:
-        track_id = request.get("track_id")
-        access_token = request.get("access_token")
+    track_id = request.get("track_id")
+    access_token = request.get("access_token")
+    
+    if not track_id:
+        raise HTTPException(status_code=400, detail="track_id is required")
+    if not access_token:
+        raise HTTPException(status_code=400, detail="access_token is required")
         
-        if not track_id:
-            raise HTTPException(status_code=400, detail="track_id is required")
-        if not access_token:
-            raise HTTPException(status_code=400, detail="access_token is required")
-            
-        result = await spotify_service.unlike_track(track_id, access_token)
-        return {"success": result}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await spotify_service.unlike_track(track_id, access_token)
+    return {"success": result}
 
 # Deezer API endpoints
 @app.get("/deezer/search")
 async def search_deezer_tracks(query: str, limit: int = 20):
     """Search tracks on Deezer"""
-    try:
-        tracks = await deezer_service.search_tracks(query, limit)
-        return {"tracks": tracks}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    tracks = await deezer_service.search_tracks(query, limit)
+    return {"tracks": tracks}
 
 @app.get("/deezer/track/{track_id}")
 async def get_deezer_track(track_id: str):
     """Get track details from Deezer"""
-    try:
-        track = await deezer_service.get_track(track_id)
-        return {"track": track}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    track = await deezer_service.get_track(track_id)
+    return {"track": track}
 
 @app.get("/deezer/preview/{track_id}")
 async def get_deezer_preview(track_id: str):
     """Get track preview URL from Deezer"""
-    try:
-        preview_url = await deezer_service.get_preview_url(track_id)
-        return {"preview_url": preview_url}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-# AI Music Service endpoints
-@app.post("/ai/analyze-taste")
-async def analyze_music_taste(request: TrackAnalysisRequest):
-    """Analyze music taste using AI"""
-    try:
-        result = await ml_service.analyze_music_taste_ai(request.user_id, request.top_tracks)
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.post("/ai/find-similar-tracks")
-async def find_similar_tracks(request: dict):
-    """Find similar tracks using AI"""
-    try:
-        similar_tracks = await ml_service.find_similar_tracks_ai(
-            request["exclude_track_ids"],
-            request.get("limit", 50)
-        )
-        return {"similar_tracks": similar_tracks}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.get("/ai/generate-vibe-name")
-async def generate_vibe_name():
-    """Generate a random vibe mode name"""
-    try:
-        name = await ml_service.generate_vibe_mode_name()
-        return {"name": name}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    preview_url = await deezer_service.get_preview_url(track_id)
+    return {"preview_url": preview_url}
 
 # Authentication endpoints
 @app.get("/auth/authorize")
 async def get_authorization_url():
     """Get Spotify authorization URL with PKCE"""
-    try:
-        auth_data = auth_service.get_authorization_url()
-        return auth_data
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    auth_data = await asyncio.to_thread(auth_service.get_authorization_url)
+    return auth_data
 
 @app.post("/auth/token")
 async def exchange_code_for_tokens(request: dict):
     """Exchange authorization code for tokens"""
-    try:
-        code = request.get("code")
-        session_id = request.get("session_id")
-        
-        if not code or not session_id:
-            raise HTTPException(status_code=400, detail="code and session_id are required")
-        
-        tokens = await auth_service.exchange_code_for_tokens(code, session_id)
-        return tokens
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    code = request.get("code")
+    session_id = request.get("session_id")
+    
+    if not code or not session_id:
+        raise HTTPException(status_code=400, detail="code and session_id are required")
+    
+    tokens = await auth_service.exchange_code_for_tokens(code, session_id)
+    return tokens
 
 @app.post("/auth/refresh")
 async def refresh_access_token(request: dict):
     """Refresh access token"""
-    try:
-        refresh_token = request.get("refresh_token")
-        if not refresh_token:
-            raise HTTPException(status_code=400, detail="refresh_token is required")
-        
-        tokens = await auth_service.refresh_access_token(refresh_token)
-        return tokens
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    refresh_token = request.get("refresh_token")
+    if not refresh_token:
+        raise HTTPException(status_code=400, detail="refresh_token is required")
+    
+    tokens = await auth_service.refresh_access_token(refresh_token)
+    return tokens
 
 @app.get("/auth/profile")
-async def get_user_profile(access_token: str):
+async def get_auth_user_profile(access_token: str):
     """Get current user profile"""
-    try:
-        profile = await auth_service.get_user_profile(access_token)
-        return profile
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    profile = await auth_service.get_user_profile(access_token)
+    return profile
 
 @app.post("/auth/validate")
 async def validate_token(request: dict):
     """Validate access token"""
-    try:
-        access_token = request.get("access_token")
-        if not access_token:
-            raise HTTPException(status_code=400, detail="access_token is required")
-        
-        is_valid = await auth_service.validate_token(access_token)
-        return {"valid": is_valid}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    access_token = request.get("access_token")
+    if not access_token:
+        raise HTTPException(status_code=400, detail="access_token is required")
+    
+    is_valid = await auth_service.validate_token(access_token)
+    return {"valid": is_valid}
 
 # Enhanced Spotify endpoints
 @app.get("/spotify/user-profile")
 async def get_spotify_user_profile(access_token: str):
     """Get Spotify user profile"""
-    try:
-        profile = await spotify_service.get_user_profile(access_token)
-        return profile
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    profile = await spotify_service.get_user_profile(access_token)
+    return profile
 
 @app.get("/spotify/user-top-tracks")
 async def get_spotify_user_top_tracks(access_token: str, time_range: str = "medium_term", limit: int = 50):
     """Get user's top tracks"""
-    try:
-        tracks = await spotify_service.get_user_top_tracks(access_token, time_range, limit)
-        return {"tracks": tracks}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    tracks = await spotify_service.get_user_top_tracks(access_token, time_range, limit)
+    return {"tracks": tracks}
 
 @app.get("/spotify/user-top-artists")
 async def get_spotify_user_top_artists(access_token: str, time_range: str = "medium_term", limit: int = 50):
     """Get user's top artists"""
-    try:
-        artists = await spotify_service.get_user_top_artists(access_token, time_range, limit)
-        return {"artists": artists}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    artists = await spotify_service.get_user_top_artists(access_token, time_range, limit)
+    return {"artists": artists}
 
 @app.get("/spotify/user-playlists")
 async def get_spotify_user_playlists(access_token: str, limit: int = 50):
     """Get user's playlists"""
-    try:
-        playlists = await spotify_service.get_user_playlists(access_token, limit)
-        return {"playlists": playlists}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    playlists = await spotify_service.get_user_playlists(access_token, limit)
+    return {"playlists": playlists}
 
 @app.get("/spotify/playlist-tracks")
 async def get_spotify_playlist_tracks(access_token: str, playlist_id: str, limit: int = 100):
     """Get tracks from a playlist"""
-    try:
-        tracks = await spotify_service.get_playlist_tracks(access_token, playlist_id, limit)
-        return {"tracks": tracks}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    tracks = await spotify_service.get_playlist_tracks(access_token, playlist_id, limit)
+    return {"tracks": tracks}
 
 @app.post("/spotify/create-playlist")
 async def create_spotify_playlist(request: dict):
     """Create a new playlist"""
-    try:
-        access_token = request.get("access_token")
-        name = request.get("name")
-        description = request.get("description", "")
-        public = request.get("public", False)
-        
-        if not access_token or not name:
-            raise HTTPException(status_code=400, detail="access_token and name are required")
-        
-        playlist = await spotify_service.create_playlist(access_token, name, description, public)
-        return playlist
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    access_token = request.get("access_token")
+    name = request.get("name")
+    description = request.get("description", "")
+    public = request.get("public", False)
+    
+    if not access_token or not name:
+        raise HTTPException(status_code=400, detail="access_token and name are required")
+    
+    playlist = await spotify_service.create_playlist(access_token, name, description, public)
+    return playlist
 
 @app.post("/spotify/add-tracks-to-playlist")
 async def add_tracks_to_spotify_playlist(request: dict):
     """Add tracks to a playlist"""
-    try:
-        access_token = request.get("access_token")
-        playlist_id = request.get("playlist_id")
-        track_uris = request.get("track_uris", [])
-        
-        if not access_token or not playlist_id or not track_uris:
-            raise HTTPException(status_code=400, detail="access_token, playlist_id, and track_uris are required")
-        
-        success = await spotify_service.add_tracks_to_playlist(access_token, playlist_id, track_uris)
-        return {"success": success}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    access_token = request.get("access_token")
+    playlist_id = request.get("playlist_id")
+    track_uris = request.get("track_uris", [])
+    
+    if not access_token or not playlist_id or not track_uris:
+        raise HTTPException(status_code=400, detail="access_token, playlist_id, and track_uris are required")
+    
+    success = await spotify_service.add_tracks_to_playlist(access_token, playlist_id, track_uris)
+    return {"success": success}
 
 @app.post("/spotify/remove-tracks-from-playlist")
 async def remove_tracks_from_spotify_playlist(request: dict):
     """Remove tracks from a playlist"""
-    try:
-        access_token = request.get("access_token")
-        playlist_id = request.get("playlist_id")
-        track_uris = request.get("track_uris", [])
-        
-        if not access_token or not playlist_id or not track_uris:
-            raise HTTPException(status_code=400, detail="access_token, playlist_id, and track_uris are required")
-        
-        success = await spotify_service.remove_tracks_from_playlist(access_token, playlist_id, track_uris)
-        return {"success": success}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.get("/spotify/search")
-async def search_spotify_tracks(query: str, limit: int = 20):
-    """Search for tracks on Spotify"""
-    try:
-        tracks = await spotify_service.search_tracks(query, limit)
-        return {"tracks": tracks}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    access_token = request.get("access_token")
+    playlist_id = request.get("playlist_id")
+    track_uris = request.get("track_uris", [])
+    
+    if not access_token or not playlist_id or not track_uris:
+        raise HTTPException(status_code=400, detail="access_token, playlist_id, and track_uris are required")
+    
+    success = await spotify_service.remove_tracks_from_playlist(access_token, playlist_id, track_uris)
+    return {"success": success}
 
 @app.post("/spotify/audio-features")
 async def get_spotify_audio_features(request: dict):
     """Get audio features for tracks"""
-    try:
-        track_ids = request.get("track_ids", [])
-        features = await spotify_service.get_audio_features(track_ids)
-        return {"features": features}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    track_ids = request.get("track_ids", [])
+    missing = [track_id for track_id in dict.fromkeys(track_ids) if track_id not in audio_features_cache]
+    batches = await asyncio.gather(*(
+        fetch_audio_features_batch(missing[i:i + AUDIO_FEATURES_BATCH_SIZE])
+        for i in range(0, len(missing), AUDIO_FEATURES_BATCH_SIZE)
+    ))
+    fetched = {feature["id"]: feature for batch in batches for feature in batch if feature}
+    audio_features_cache.update(fetched)
+    
+    features = [fetched.get(track_id) or audio_features_cache.get(track_id) for track_id in track_ids]
+    return {"features": [feature for feature in features if feature]}
 
 # AI Music Analysis endpoints
 @app.post("/ai/analyze-taste")
-async def analyze_music_taste(request: dict):
-    """Analyze user's music taste"""
-    try:
-        user_id = request.get("user_id")
-        top_tracks = request.get("top_tracks", [])
-        
-        if not user_id or not top_tracks:
-            raise HTTPException(status_code=400, detail="user_id and top_tracks are required")
-        
-        taste_profile = ai_music_service.analyze_music_taste(user_id, top_tracks)
-        return taste_profile
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def analyze_music_taste(request: TrackAnalysisRequest):
+    """Analyze music taste using AI"""
+    ml_service = await get_ml_service()
+    taste_profile = await ml_service.analyze_music_taste_ai(request.user_id, request.track_dicts())
+    invalidate_profile(request.user_id)
+    return taste_profile
 
 @app.post("/ai/find-similar-tracks")
-async def find_similar_tracks_ai(request: dict):
+async def find_similar_tracks(request: dict):
     """Find similar tracks using AI"""
-    try:
-        user_id = request.get("user_id")
-        available_tracks = request.get("available_tracks", [])
-        exclude_track_ids = request.get("exclude_track_ids", [])
-        limit = request.get("limit", 50)
-        
-        if not user_id or not available_tracks:
-            raise HTTPException(status_code=400, detail="user_id and available_tracks are required")
-        
-        similar_tracks = ai_music_service.find_similar_tracks(user_id, available_tracks, exclude_track_ids, limit)
-        return {"similar_tracks": similar_tracks}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    ml_service = await get_ml_service()
+    similar_tracks = await ml_service.find_similar_tracks_ai(
+        request["exclude_track_ids"],
+        request.get("limit", 50)
+    )
+    return {"similar_tracks": similar_tracks}
 
 @app.get("/ai/generate-vibe-name")
-async def generate_ai_vibe_name(user_id: str):
-    """Generate a vibe mode name based on taste profile"""
-    try:
-        if not user_id:
-            raise HTTPException(status_code=400, detail="user_id is required")
-        
-        name = ai_music_service.generate_vibe_mode_name(user_id)
-        return {"name": name}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def generate_vibe_name():
+    """Generate a random vibe mode name"""
+    ml_service = await get_ml_service()
+    name = await ml_service.generate_vibe_mode_name()
+    return {"name": name}
 
 @app.get("/ai/taste-profile")
 async def get_taste_profile(user_id: str):
     """Get stored taste profile for user"""
-    try:
-        if not user_id:
-            raise HTTPException(status_code=400, detail="user_id is required")
-        
-        profile = ai_music_service.get_taste_profile(user_id)
-        return {"profile": profile}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    if not user_id:
+        raise HTTPException(status_code=400, detail="user_id is required")
+    
+    profile = await get_cached_profile(
+        "taste", user_id, lambda uid: asyncio.to_thread(ai_music_service.get_taste_profile, uid)
+    )
+    return {"profile": profile}
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "ml_service": "active", "spotify_service": "active", "deezer_service": "active", "auth_service": "active", "ai_music_service": "active"}
+    return {"status": "healthy", "ml_service": ml_service_status(), "spotify_service": "active", "deezer_service": "active", "auth_service": "active", "ai_music_service": "active"}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop=EVENT_LOOP,
+        # Caches and cache invalidation are per process; more workers would serve stale
+        # profiles until invalidation is shared (e.g. through Redis)
+        workers=int(os.getenv("WEB_CONCURRENCY", 1))
+    )
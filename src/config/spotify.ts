@@ -28,13 +28,16 @@ export const SPOTIFY_REDIRECT_URI = AuthSession.makeRedirectUri({
   useProxy: true,     // essential for Expo Go / tunnel
 });
 
+// Everything but the code challenge is fixed at startup, so encode it once
+const SPOTIFY_AUTH_URL_PREFIX = `https://accounts.spotify.com/authorize?client_id=${encodeURIComponent(
+  SPOTIFY_CLIENT_ID
+)}&response_type=code&redirect_uri=${encodeURIComponent(
+  SPOTIFY_REDIRECT_URI
+)}&scope=${encodeURIComponent(SPOTIFY_SCOPES.join(" "))}&code_challenge_method=S256`;
+
 // ✅ Build full Spotify OAuth URL (PKCE flow)
-export const getSpotifyAuthUrl = (codeChallenge: string) => {
-  const scope = encodeURIComponent(SPOTIFY_SCOPES.join(" "));
-  return `https://accounts.spotify.com/authorize?client_id=${SPOTIFY_CLIENT_ID}&response_type=code&redirect_uri=${encodeURIComponent(
-    SPOTIFY_REDIRECT_URI
-  )}&scope=${scope}&code_challenge_method=S256&code_challenge=${codeChallenge}`;
-};
+export const getSpotifyAuthUrl = (codeChallenge: string) =>
+  `${SPOTIFY_AUTH_URL_PREFIX}&code_challenge=${encodeURIComponent(codeChallenge)}`;
 
 // ✅ Export config object
 export const SPOTIFY_CONFIG = {
@@ -5,10 +5,15 @@ import { StatusBar } from "expo-status-bar";
 import { Ionicons } from "@expo/vector-icons";
 import { useRoute, useNavigation } from "@react-navigation/native";
 import { spotifyService } from "../services/spotifyService";
-import { deezerService } from "../services/deezerService";
+import { deezerService, DEEZER_MAX_CONCURRENCY } from "../services/deezerService";
 import { SpotifyTrack, SpotifyPlaylist } from "../types/music";
 import { Audio } from "expo-av";
 import { removeDuplicateTracksByName } from "../utils/deduplication";
+import { mapWithConcurrency } from "../utils/concurrency";
+import { debugLog } from "../utils/logger";
+
+// Deezer lookups made up front for tracks without a Spotify preview; the rest happen on tap
+const PREVIEW_PREFETCH_LIMIT = 100;
 
 export default function PlaylistDetailScreen() {
   const route = useRoute();
@@ -39,57 +44,51 @@ export default function PlaylistDetailScreen() {
     if (!playlist?.id) return;
     
     setIsLoading(true);
+    let uniqueTracks: SpotifyTrack[];
     try {
       console.log("Loading tracks for playlist:", playlist.name);
       const playlistTracks = await spotifyService.getPlaylistTracks(playlist.id);
       console.log(`Found ${playlistTracks.length} tracks in playlist`);
       
-      // Find Deezer previews for tracks that don't have Spotify previews
-      const tracksWithPreviews = await Promise.all(
-        playlistTracks.map(async (track) => {
-          if (track.preview_url) {
-            return track; // Already has preview
-          }
-          
-          try {
-            // Search for this track on Deezer
-            const deezerTracks = await deezerService.searchTracks(
-              `${track.name} ${track.artists[0]?.name}`, 
-              1
-            );
-            
-            const bestMatch = deezerTracks.find(deezerTrack => 
-              deezerTrack.title.toLowerCase().includes(track.name.toLowerCase()) ||
-              track.name.toLowerCase().includes(deezerTrack.title.toLowerCase())
-            );
-            
-            if (bestMatch && bestMatch.preview) {
-              console.log(`✅ Found Deezer preview for ${track.name}:`, bestMatch.preview);
-              return {
-                ...track,
-                preview_url: bestMatch.preview
-              };
-            } else {
-              console.log(`❌ No Deezer preview found for ${track.name}`);
-            }
-          } catch (err) {
-            console.warn(`Failed to find preview for ${track.name}:`, err);
-          }
-          
-          return track; // Return original track even without preview
-        })
-      );
-      
       // Remove duplicate tracks by name
-      const uniqueTracks = removeDuplicateTracksByName(tracksWithPreviews);
-      
+      uniqueTracks = removeDuplicateTracksByName(playlistTracks);
       setTracks(uniqueTracks);
     } catch (error) {
       console.error("Error loading playlist tracks:", error);
       Alert.alert("Error", "Failed to load playlist tracks");
+      return;
     } finally {
       setIsLoading(false);
     }
+
+    // Fill in Deezer previews for tracks without Spotify previews while the list is already on screen
+    const missingPreviews = uniqueTracks.filter(track => !track.preview_url).slice(0, PREVIEW_PREFETCH_LIMIT);
+    await mapWithConcurrency(missingPreviews, DEEZER_MAX_CONCURRENCY, async (track) => {
+      const previewUrl = await findDeezerPreview(track);
+      if (previewUrl) setTrackPreview(track.id, previewUrl);
+    });
+  };
+
+  const findDeezerPreview = async (track: SpotifyTrack): Promise<string | null> => {
+    try {
+      // Search for this track on Deezer
+      const bestMatch = await deezerService.findPreviewMatch(track);
+      
+      if (bestMatch) {
+        debugLog(`✅ Found Deezer preview for ${track.name}:`, bestMatch.preview);
+        return bestMatch.preview;
+      }
+      debugLog(`❌ No Deezer preview found for ${track.name}`);
+    } catch (err) {
+      console.warn(`Failed to find preview for ${track.name}:`, err);
+    }
+    return null;
+  };
+
+  const setTrackPreview = (trackId: string, previewUrl: string) => {
+    setTracks(current => current.map(track => (
+      track.id === trackId ? { ...track, preview_url: previewUrl } : track
+    )));
   };
 
   const testAudioUrl = async (url: string) => {
@@ -105,17 +104,20 @@ export default function PlaylistDetailScreen() {
   };
 
   const playTrackPreview = async (track: SpotifyTrack) => {
-    if (!track.preview_url) {
+    // Tracks past the prefetch limit (or still pending) are looked up on Deezer when tapped
+    const previewUrl = track.preview_url || await findDeezerPreview(track);
+    if (!previewUrl) {
       Alert.alert("No Preview", "This track doesn't have a preview available");
       return;
     }
+    if (!track.preview_url) setTrackPreview(track.id, previewUrl);
 
     try {
       console.log("🎵 Attempting to play track:", track.name);
-      console.log("🎵 Preview URL:", track.preview_url);
+      console.log("🎵 Preview URL:", previewUrl);
 
       // Test if the URL is accessible
-      const urlAccessible = await testAudioUrl(track.preview_url);
+      const urlAccessible = await testAudioUrl(previewUrl);
       if (!urlAccessible) {
         Alert.alert("Audio Error", "The preview URL is not accessible");
         return;
@@ -140,7 +142,7 @@ export default function PlaylistDetailScreen() {
       console.log("🎵 Loading new track...");
       // Load and play new track
       const { sound: newSound } = await Audio.Sound.createAsync(
-        { uri: track.preview_url },
+        { uri: previewUrl },
         { 
           shouldPlay: true,
           volume: 1.0,
@@ -24,8 +24,11 @@ import { useRoute, useNavigation } from "@react-navigation/native";
 import { useMusicStore } from "../state/musicStore";
 import { VibeMode, SpotifyTrack, SpotifyPlaylist } from "../types/music";
 import { spotifyService } from "../services/spotifyService";
-import { deezerService } from "../services/deezerService";
+import { deezerService, DEEZER_MAX_CONCURRENCY } from "../services/deezerService";
 import { removeDuplicateTracksByName } from "../utils/deduplication";
+import { mapWithConcurrency } from "../utils/concurrency";
+import { debugLog } from "../utils/logger";
+import { yearFromReleaseDate } from "../utils/releaseDate";
 
 const { width: SCREEN_WIDTH, height: SCREEN_HEIGHT } = Dimensions.get("window");
 const SWIPE_THRESHOLD = SCREEN_WIDTH * 0.25;
@@ -157,11 +160,13 @@ export default function VibeModeScreen() {
   // Background function to find Deezer previews
   const findDeezerPreviews = async (spotifyTracks: SpotifyTrack[]) => {
     const tracksWithPreviews: SpotifyTrack[] = [];
+    // Per-track result (undefined = still searching) so matches are published in feed order
+    const matches: (SpotifyTrack | null | undefined)[] = new Array(spotifyTracks.length);
+    let nextToPublish = 0;
     
-    for (let i = 0; i < spotifyTracks.length; i++) {
+    await mapWithConcurrency(spotifyTracks, DEEZER_MAX_CONCURRENCY, async (spotifyTrack, i) => {
       // Check if component is still mounted before continuing
       if (!isMountedRef.current) {
-        console.log("🛑 Component unmounted, stopping Deezer search");
         return;
       }
       
@@ -170,47 +175,48 @@ export default function VibeModeScreen() {
       
       // Check again after delay
       if (!isMountedRef.current) {
-        console.log("🛑 Component unmounted during delay, stopping Deezer search");
         return;
       }
       
-      const spotifyTrack = spotifyTracks[i];
       try {
         // Search for this specific track on Deezer
-        const deezerTracks = await deezerService.searchTracks(
-          `${spotifyTrack.name} ${spotifyTrack.artists[0]?.name}`, 
-          3
-        );
-        
-        // Find the best match
-        const bestMatch = deezerTracks.find(deezerTrack => 
-          deezerTrack.title.toLowerCase().includes(spotifyTrack.name.toLowerCase()) ||
-          spotifyTrack.name.toLowerCase().includes(deezerTrack.title.toLowerCase())
-        );
+        const bestMatch = await deezerService.findPreviewMatch(spotifyTrack);
         
-        if (bestMatch && bestMatch.preview) {
+        if (bestMatch) {
           // Use Spotify track data but with Deezer preview
-          const trackWithPreview = {
+          matches[i] = {
             ...spotifyTrack,
             preview_url: bestMatch.preview
           };
-          tracksWithPreviews.push(trackWithPreview);
-          console.log(`✅ Found preview for: ${spotifyTrack.name} (${tracksWithPreviews.length}/${spotifyTracks.length})`);
+          debugLog(`✅ Found preview for: ${spotifyTrack.name}`);
         } else {
-          console.log(`❌ No preview found for: ${spotifyTrack.name}`);
+          debugLog(`❌ No preview found for: ${spotifyTrack.name}`);
         }
       } catch (err) {
         console.warn(`Failed to find preview for ${spotifyTrack.name}:`, err);
       }
+      matches[i] = matches[i] ?? null;
+      
+      // Append finished matches in their original order so the feed only grows at the end
+      let published = false;
+      while (nextToPublish < matches.length && matches[nextToPublish] !== undefined) {
+        const match = matches[nextToPublish++];
+        if (match) {
+          tracksWithPreviews.push(match);
+          published = true;
+        }
+      }
       
       // Update the feed with tracks that have previews so far (only if still mounted)
-      if (tracksWithPreviews.length > 0 && isMountedRef.current) {
+      if (published && isMountedRef.current) {
         setLocalTracks(tracksWithPreviews);
         setFeedTracks(tracksWithPreviews);
       }
-    }
+    });
     
-    if (isMountedRef.current) {
+    if (!isMountedRef.current) {
+      console.log("🛑 Component unmounted, stopped Deezer search");
+    } else {
       console.log(`🎵 Background search complete: Found ${tracksWithPreviews.length} tracks with previews out of ${spotifyTracks.length} total`);
     }
   };
@@ -980,7 +986,7 @@ export default function VibeModeScreen() {
                         {track.album.name}
                       </Text>
                       <Text style={styles.releaseDate}>
-                        Released: {new Date(track.album.release_date).getFullYear()}
+                        Released: {yearFromReleaseDate(track.album.release_date)}
                       </Text>
                     </BlurView>
                   </Animated.View>
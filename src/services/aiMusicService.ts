@@ -1,5 +1,9 @@
 import { SpotifyTrack } from "../types/music";
-import { spotifyService } from "./spotifyService";
+import { spotifyService, SPOTIFY_MAX_CONCURRENCY } from "./spotifyService";
+import { topKeysByCount, topKBy } from "../utils/ranking";
+import { yearFromReleaseDate } from "../utils/releaseDate";
+import { compileKeywords, collectKeywordTags, escapeRegExp } from "../utils/keywords";
+import { mapWithConcurrency } from "../utils/concurrency";
 
 export interface MusicTasteProfile {
   genres: string[];
@@ -51,8 +55,64 @@ export interface SimilarTrack {
   reasons: string[];
 }
 
+// Keyword tables for genre/mood inference. Each table is compiled into a single
+// regex so a string is scanned once instead of once per keyword.
+const GENRE_KEYWORDS: Record<string, string> = {
+  rap: "Hip-Hop",
+  hip: "Hip-Hop",
+  rock: "Rock",
+  pop: "Pop",
+  jazz: "Jazz",
+  electronic: "Electronic",
+  country: "Country",
+  classical: "Classical",
+  blues: "Blues",
+  folk: "Folk",
+  reggae: "Reggae",
+};
+const GENRE_ORDER = [...new Set(Object.values(GENRE_KEYWORDS))];
+// Artist names are matched more strictly: "hip" only counts in a track name
+const GENRE_ARTIST_KEYWORDS: Record<string, string> = Object.fromEntries(
+  Object.entries(GENRE_KEYWORDS).filter(([keyword]) => keyword !== "hip")
+);
+
+const MOOD_KEYWORDS: Record<string, string> = {
+  happy: "Happy", joy: "Happy", smile: "Happy", dance: "Happy", party: "Happy", celebration: "Happy",
+  energy: "Energetic", power: "Energetic", fire: "Energetic", rock: "Energetic", metal: "Energetic", intense: "Energetic",
+  calm: "Calm", peace: "Calm", quiet: "Calm", chill: "Calm", soft: "Calm", gentle: "Calm",
+  sad: "Melancholic", lonely: "Melancholic", tears: "Melancholic", heartbreak: "Melancholic", melancholy: "Melancholic", blue: "Melancholic",
+};
+const MOOD_GROUPS: Record<string, string[]> = {
+  Happy: ["Happy", "Upbeat"],
+  Energetic: ["Energetic", "Intense"],
+  Calm: ["Calm", "Relaxed"],
+  Melancholic: ["Melancholic", "Sad"],
+};
+const MOOD_GROUP_COUNT = Object.keys(MOOD_GROUPS).length;
+
+const GENRE_PATTERN = compileKeywords(GENRE_KEYWORDS);
+const GENRE_ARTIST_PATTERN = compileKeywords(GENRE_ARTIST_KEYWORDS);
+const MOOD_PATTERN = compileKeywords(MOOD_KEYWORDS);
+
+// A Spotify search used to gather candidates, and the score a result needs to be kept
+interface CandidateSearch {
+  kind: string;
+  term: string;
+  query: string;
+  limit: number;
+  minScore: number;
+}
+
+// Lookup structures derived from a taste profile, built once per profile rather than per scored track
+interface TasteProfileIndex {
+  artists: Set<string>;
+  decades: Set<string>;
+  genrePattern: RegExp | null;
+}
+
 class AIMusicService {
   private tasteProfile: MusicTasteProfile | null = null;
+  private profileIndex: TasteProfileIndex | null = null;
 
   /**
    * Analyze user's top tracks to create a music taste profile
@@ -64,16 +124,46 @@ class AIMusicService {
       throw new Error("No tracks provided for analysis");
     }
 
-    // Extract genres from tracks
-    const genres = this.extractGenres(topTracks);
-    
-    // Analyze basic track properties (no audio features needed)
-    const popularity = this.analyzeFeature(topTracks.map(t => t.popularity));
-    const artists = [...new Set(topTracks.flatMap(t => t.artists.map(a => a.name)))];
-    const decades = this.extractDecades(topTracks);
-    
-    // Determine moods based on track names and artists (simplified)
-    const moods = this.determineMoodsFromTracks(topTracks);
+    // Gather every per-track statistic in a single pass over the tracks
+    const genreCount: { [key: string]: number } = {};
+    const decadeCount: { [key: string]: number } = {};
+    const artistSet = new Set<string>();
+    const moodTags = new Set<string>();
+    const popularities: number[] = [];
+
+    for (const track of topTracks) {
+      // Genres are counted once per artist on the track
+      // This is a simplified approach - in reality, you'd need to get artist genres from Spotify
+      if (track.artists.length > 0) {
+        for (const genre of this.inferGenresFromTrack(track)) {
+          genreCount[genre] = (genreCount[genre] || 0) + track.artists.length;
+        }
+      }
+
+      popularities.push(track.popularity);
+
+      for (const artist of track.artists) {
+        if (artistSet.size === 20) break; // Top 20 artists
+        artistSet.add(artist.name);
+      }
+
+      const year = yearFromReleaseDate(track.album.release_date);
+      if (year !== null) {
+        const decadeStr = `${Math.floor(year / 10) * 10}s`;
+        decadeCount[decadeStr] = (decadeCount[decadeStr] || 0) + 1;
+      }
+
+      // Analyze track names for mood indicators
+      if (moodTags.size < MOOD_GROUP_COUNT) {
+        collectKeywordTags(track.name.toLowerCase(), MOOD_PATTERN, moodTags);
+      }
+    }
+
+    const genres = topKeysByCount(genreCount, 10);
+    const popularity = this.analyzeFeature(popularities);
+    const artists = [...artistSet];
+    const decades = topKeysByCount(decadeCount, 3);
+    const moods = this.determineMoodsFromTags(moodTags, popularity.average);
 
     // Create simplified taste profile without audio features
     this.tasteProfile = {
@@ -88,9 +178,16 @@ class AIMusicService {
       popularity,
       key: [], // Placeholder
       timeSignature: [], // Placeholder
-      artists: artists.slice(0, 20), // Top 20 artists
+      artists, // Top 20 artists
       decades
     };
+    this.profileIndex = {
+      artists: new Set(this.tasteProfile.artists),
+      decades: new Set(decades),
+      genrePattern: genres.length > 0
+        ? new RegExp(genres.map(escapeRegExp).join("|"), "i")
+        : null
+    };
 
     console.log("🎵 Music taste profile created:", this.tasteProfile);
     return this.tasteProfile;
@@ -106,91 +203,58 @@ class AIMusicService {
 
     console.log("🔍 Finding similar tracks based on taste profile");
     
-    const similarTracks: SimilarTrack[] = [];
-    
-    // Search for tracks by genre combinations
-    for (const genre of this.tasteProfile.genres.slice(0, 3)) {
-      try {
-        const genreTracks = await spotifyService.searchTracks(genre, 20);
-        const filteredTracks = genreTracks.filter(track => !excludeTrackIds.includes(track.id));
-        
-        for (const track of filteredTracks) {
-          const similarity = await this.calculateSimilarity(track);
-          if (similarity.similarityScore > 0.3) { // Lowered threshold for fallback
-            similarTracks.push(similarity);
-          }
-        }
-      } catch (error) {
-        console.warn("Error searching for genre:", genre, error);
-      }
-    }
-
-    // Search for tracks by mood
-    for (const mood of this.tasteProfile.moods) {
-      try {
-        const moodTracks = await spotifyService.searchTracks(`${mood} music`, 15);
-        const filteredTracks = moodTracks.filter(track => !excludeTrackIds.includes(track.id));
-        
-        for (const track of filteredTracks) {
-          const similarity = await this.calculateSimilarity(track);
-          if (similarity.similarityScore > 0.2) { // Lowered threshold for fallback
-            similarTracks.push(similarity);
-          }
-        }
-      } catch (error) {
-        console.warn("Error searching for mood:", mood, error);
-      }
-    }
-
-    // Search for tracks by similar artists
-    for (const artist of this.tasteProfile.artists.slice(0, 5)) {
-      try {
-        const artistTracks = await spotifyService.searchTracks(`artist:${artist}`, 10);
-        const filteredTracks = artistTracks.filter(track => !excludeTrackIds.includes(track.id));
-        
-        for (const track of filteredTracks) {
-          const similarity = await this.calculateSimilarity(track);
-          if (similarity.similarityScore > 0.1) { // Lowered threshold for fallback
-            similarTracks.push(similarity);
-          }
-        }
-      } catch (error) {
-        console.warn("Error searching for artist:", artist, error);
-      }
-    }
+    const excluded = new Set(excludeTrackIds);
+    // All searches run concurrently and each batch is scored as soon as it arrives
+    const similarTracks = await this.searchAndScore([
+      ...this.tasteProfile.genres.slice(0, 3).map(genre => (
+        { kind: "genre", term: genre, query: genre, limit: 20, minScore: 0.3 } // Lowered threshold for fallback
+      )),
+      ...this.tasteProfile.moods.map(mood => (
+        { kind: "mood", term: mood, query: `${mood} music`, limit: 15, minScore: 0.2 } // Lowered threshold for fallback
+      )),
+      ...this.tasteProfile.artists.slice(0, 5).map(artist => (
+        { kind: "artist", term: artist, query: `artist:${artist}`, limit: 10, minScore: 0.1 } // Lowered threshold for fallback
+      )),
+    ], excluded);
 
     // If we don't have enough tracks, do broader searches
     if (similarTracks.length < 20) {
       console.log("🔍 Not enough tracks found, doing broader searches...");
       
       // Search for popular tracks in preferred genres
-      for (const genre of this.tasteProfile.genres.slice(0, 2)) {
-        try {
-          const popularTracks = await spotifyService.searchTracks(`popular ${genre}`, 15);
-          const filteredTracks = popularTracks.filter(track => !excludeTrackIds.includes(track.id));
-          
-          for (const track of filteredTracks) {
-            const similarity = await this.calculateSimilarity(track);
-            if (similarity.similarityScore > 0.1) {
-              similarTracks.push(similarity);
-            }
-          }
-        } catch (error) {
-          console.warn("Error searching for popular genre:", genre, error);
-        }
-      }
+      similarTracks.push(...await this.searchAndScore(
+        this.tasteProfile.genres.slice(0, 2).map(genre => (
+          { kind: "popular genre", term: genre, query: `popular ${genre}`, limit: 15, minScore: 0.1 }
+        )),
+        excluded
+      ));
     }
 
     // Remove duplicates and sort by similarity score
     const uniqueTracks = this.removeDuplicateTracks(similarTracks);
-    const sortedTracks = uniqueTracks
-      .sort((a, b) => b.similarityScore - a.similarityScore)
-      .slice(0, limit);
+    const sortedTracks = topKBy(uniqueTracks, limit, t => t.similarityScore);
 
     console.log(`🎯 Found ${sortedTracks.length} similar tracks`);
     return sortedTracks;
   }
 
+  /**
+   * Run candidate searches with bounded concurrency, scoring each batch as it lands.
+   * Results are concatenated in search order so deduplication keeps the same winners.
+   */
+  private async searchAndScore(searches: CandidateSearch[], excluded: Set<string>): Promise<SimilarTrack[]> {
+    const batches = await mapWithConcurrency(searches, SPOTIFY_MAX_CONCURRENCY, async search => {
+      try {
+        const tracks = await spotifyService.searchTracks(search.query, search.limit);
+        return this.scoreTracks(tracks.filter(track => !excluded.has(track.id)), search.minScore);
+      } catch (error) {
+        console.warn(`Error searching for ${search.kind}:`, search.term, error);
+        return [];
+      }
+    });
+    return batches.flat();
+  }
+
   /**
    * Generate a vibe mode name based on the taste profile
    */
@@ -215,44 +279,13 @@ class AIMusicService {
   }
 
 
-  private extractGenres(tracks: SpotifyTrack[]): string[] {
-    const genreCount: { [key: string]: number } = {};
-    
-    tracks.forEach(track => {
-      track.artists.forEach(artist => {
-        // This is a simplified approach - in reality, you'd need to get artist genres from Spotify
-        // For now, we'll use track popularity and other features to infer genres
-        const inferredGenres = this.inferGenresFromTrack(track);
-        inferredGenres.forEach(genre => {
-          genreCount[genre] = (genreCount[genre] || 0) + 1;
-        });
-      });
-    });
-
-    return Object.entries(genreCount)
-      .sort(([,a], [,b]) => b - a)
-      .slice(0, 10)
-      .map(([genre]) => genre);
-  }
-
   private inferGenresFromTrack(track: SpotifyTrack): string[] {
     // This is a simplified genre inference based on track name and artist
     // In a real implementation, you'd use Spotify's artist genre data
-    const genres: string[] = [];
-    const name = track.name.toLowerCase();
-    const artist = track.artists[0]?.name.toLowerCase() || "";
-
-    // Basic genre inference patterns
-    if (name.includes("rap") || name.includes("hip") || artist.includes("rap")) genres.push("Hip-Hop");
-    if (name.includes("rock") || artist.includes("rock")) genres.push("Rock");
-    if (name.includes("pop") || artist.includes("pop")) genres.push("Pop");
-    if (name.includes("jazz") || artist.includes("jazz")) genres.push("Jazz");
-    if (name.includes("electronic") || artist.includes("electronic")) genres.push("Electronic");
-    if (name.includes("country") || artist.includes("country")) genres.push("Country");
-    if (name.includes("classical") || artist.includes("classical")) genres.push("Classical");
-    if (name.includes("blues") || artist.includes("blues")) genres.push("Blues");
-    if (name.includes("folk") || artist.includes("folk")) genres.push("Folk");
-    if (name.includes("reggae") || artist.includes("reggae")) genres.push("Reggae");
+    const found = new Set<string>();
+    collectKeywordTags(track.name.toLowerCase(), GENRE_PATTERN, found);
+    collectKeywordTags(track.artists[0]?.name.toLowerCase() || "", GENRE_ARTIST_PATTERN, found);
+    const genres = GENRE_ORDER.filter(genre => found.has(genre));
 
     // Default to pop if no genres found
     if (genres.length === 0) genres.push("Pop");
@@ -261,49 +294,31 @@ class AIMusicService {
   }
 
   private analyzeFeature(values: number[]): { min: number; max: number; average: number } {
-    const validValues = values.filter(v => !isNaN(v) && v !== null);
-    if (validValues.length === 0) return { min: 0, max: 0, average: 0 };
+    // One pass for min/max/sum; also avoids spreading large arrays into Math.min/max
+    let min = Infinity;
+    let max = -Infinity;
+    let sum = 0;
+    let count = 0;
+    for (const v of values) {
+      if (v === null || isNaN(v)) continue;
+      if (v < min) min = v;
+      if (v > max) max = v;
+      sum += v;
+      count++;
+    }
+    if (count === 0) return { min: 0, max: 0, average: 0 };
 
-    return {
-      min: Math.min(...validValues),
-      max: Math.max(...validValues),
-      average: validValues.reduce((sum, val) => sum + val, 0) / validValues.length
-    };
+    return { min, max, average: sum / count };
   }
 
-  private determineMoodsFromTracks(tracks: SpotifyTrack[]): string[] {
+  private determineMoodsFromTags(found: Set<string>, avgPopularity: number): string[] {
     const moods: string[] = [];
     
-    // Analyze track names for mood indicators
-    const trackNames = tracks.map(t => t.name.toLowerCase());
-    const allText = trackNames.join(' ');
-    
-    // Happy/Upbeat indicators
-    if (allText.includes('happy') || allText.includes('joy') || allText.includes('smile') || 
-        allText.includes('dance') || allText.includes('party') || allText.includes('celebration')) {
-      moods.push("Happy", "Upbeat");
-    }
-    
-    // Energetic indicators
-    if (allText.includes('energy') || allText.includes('power') || allText.includes('fire') || 
-        allText.includes('rock') || allText.includes('metal') || allText.includes('intense')) {
-      moods.push("Energetic", "Intense");
-    }
-    
-    // Calm/Relaxed indicators
-    if (allText.includes('calm') || allText.includes('peace') || allText.includes('quiet') || 
-        allText.includes('chill') || allText.includes('soft') || allText.includes('gentle')) {
-      moods.push("Calm", "Relaxed");
-    }
-    
-    // Melancholic indicators
-    if (allText.includes('sad') || allText.includes('lonely') || allText.includes('tears') || 
-        allText.includes('heartbreak') || allText.includes('melancholy') || allText.includes('blue')) {
-      moods.push("Melancholic", "Sad");
+    for (const [group, groupMoods] of Object.entries(MOOD_GROUPS)) {
+      if (found.has(group)) moods.push(...groupMoods);
     }
     
     // Default moods based on popularity
-    const avgPopularity = tracks.reduce((sum, t) => sum + t.popularity, 0) / tracks.length;
     if (avgPopularity > 70) {
       moods.push("Popular", "Mainstream");
     } else if (avgPopularity > 40) {
@@ -341,47 +356,34 @@ class AIMusicService {
     return [...new Set(moods)].slice(0, 5);
   }
 
-  private extractDecades(tracks: SpotifyTrack[]): string[] {
-    const decades: { [key: string]: number } = {};
-    
-    tracks.forEach(track => {
-      // Extract year from release date
-      const year = new Date(track.album.release_date).getFullYear();
-      if (!isNaN(year)) {
-        const decade = Math.floor(year / 10) * 10;
-        const decadeStr = `${decade}s`;
-        decades[decadeStr] = (decades[decadeStr] || 0) + 1;
-      }
-    });
-
-    return Object.entries(decades)
-      .sort(([,a], [,b]) => b - a)
-      .slice(0, 3)
-      .map(([decade]) => decade);
-  }
-
-  private async calculateSimilarity(track: SpotifyTrack): Promise<SimilarTrack> {
-    if (!this.tasteProfile) {
-      return { track, similarityScore: 0, reasons: [] };
-    }
+  /**
+   * Score a batch of candidates and keep those above `minScore`.
+   * Scoring is pure CPU work, so the whole batch is done synchronously in one pass.
+   */
+  private scoreTracks(tracks: SpotifyTrack[], minScore: number): SimilarTrack[] {
+    if (!this.tasteProfile) return [];
 
     // Skip audio features for now due to 403 errors - use fallback method
-    console.log("Using fallback similarity calculation for:", track.name);
-    return this.calculateBasicSimilarity(track);
+    const scored: SimilarTrack[] = [];
+    for (const track of tracks) {
+      const similarity = this.calculateBasicSimilarity(track);
+      if (similarity.similarityScore > minScore) scored.push(similarity);
+    }
+    return scored;
   }
 
   private calculateBasicSimilarity(track: SpotifyTrack): SimilarTrack {
-    if (!this.tasteProfile) {
+    if (!this.tasteProfile || !this.profileIndex) {
       return { track, similarityScore: 0, reasons: [] };
     }
+    const profileIndex = this.profileIndex;
 
     const reasons: string[] = [];
     let score = 0;
 
     // Check if track is by a preferred artist (highest weight)
-    const trackArtists = track.artists.map(a => a.name);
-    const hasPreferredArtist = trackArtists.some(artist => 
-      this.tasteProfile!.artists.includes(artist)
+    const hasPreferredArtist = track.artists.some(artist => 
+      profileIndex.artists.has(artist.name)
     );
     
     if (hasPreferredArtist) {
@@ -390,23 +392,19 @@ class AIMusicService {
     }
 
     // Check if track is from a preferred decade
-    const trackYear = new Date(track.album.release_date).getFullYear();
-    if (!isNaN(trackYear)) {
+    const trackYear = yearFromReleaseDate(track.album.release_date);
+    if (trackYear !== null) {
       const trackDecade = Math.floor(trackYear / 10) * 10;
       const decadeStr = `${trackDecade}s`;
       
-      if (this.tasteProfile.decades.includes(decadeStr)) {
+      if (profileIndex.decades.has(decadeStr)) {
         score += 0.3;
         reasons.push(`From preferred decade (${decadeStr})`);
       }
     }
 
     // Check if track name contains preferred genre keywords
-    const trackName = track.name.toLowerCase();
-    const preferredGenres = this.tasteProfile.genres.map(g => g.toLowerCase());
-    const hasGenreKeyword = preferredGenres.some(genre => 
-      trackName.includes(genre) || genre.includes(trackName)
-    );
+    const hasGenreKeyword = profileIndex.genrePattern?.test(track.name) ?? false;
     
     if (hasGenreKeyword) {
       score += 0.2;
@@ -1,5 +1,21 @@
 // src/services/deezerService.ts
 import { SpotifyTrack } from "../types/music";
+import { mapWithConcurrency, createSingleFlight } from "../utils/concurrency";
+import { TTLCache } from "../utils/cache";
+import { debugLog } from "../utils/logger";
+import { TokenBucket } from "../utils/rateLimit";
+
+// Max Deezer requests in flight at once when matching many tracks
+export const DEEZER_MAX_CONCURRENCY = 8;
+
+// Results fetched when matching a Spotify track; the match is nearly always in the top few
+const DEEZER_MATCH_LIMIT = 3;
+
+// Most tracks returned for a vibe mode
+const VIBE_MODE_TRACK_LIMIT = 50;
+
+// Deezer allows 50 requests per 5 seconds; a burst of 5 plus 9/s never exceeds that in any window
+const deezerRateLimiter = new TokenBucket(5, 9);
 
 export interface DeezerTrack {
   id: string;
@@ -21,34 +37,52 @@ export interface DeezerTrack {
 export interface DeezerSearchResponse {
   data: DeezerTrack[];
   total: number;
+  // Set instead of data on failures such as quota overruns, which still come back as HTTP 200
+  error?: { type: string; message: string; code: number };
 }
 
 class DeezerService {
   private readonly BASE_URL = "https://api.deezer.com";
+  // The same Spotify -> Deezer matches are looked up again and again, so keep results for an hour
+  private readonly searchCache = new TTLCache<string, DeezerTrack[]>(10_000, 60 * 60 * 1000);
+  // Concurrent identical searches (e.g. the same track on two screens) share one request
+  private readonly inflightSearches = createSingleFlight<DeezerTrack[]>();
 
   /**
-   * Search for tracks on Deezer
+   * Search for tracks on Deezer. Throws on HTTP and API errors (e.g. quota overruns)
+   * so callers can tell a failed lookup from an empty result.
    */
   async searchTracks(query: string, limit: number = 20): Promise<DeezerTrack[]> {
-    try {
-      const encodedQuery = encodeURIComponent(query);
-      const url = `${this.BASE_URL}/search/track?q=${encodedQuery}&limit=${limit}`;
-      
-      console.log("🎵 Searching Deezer for:", query);
-      
-      const response = await fetch(url);
-      if (!response.ok) {
-        throw new Error(`Deezer API error: ${response.status}`);
+    const cacheKey = `${limit}:${query}`;
+    const cached = this.searchCache.get(cacheKey);
+    if (cached) return cached;
+
+    return this.inflightSearches(cacheKey, async () => {
+      try {
+        const encodedQuery = encodeURIComponent(query);
+        const url = `${this.BASE_URL}/search/track?q=${encodedQuery}&limit=${limit}`;
+        
+        debugLog("🎵 Searching Deezer for:", query);
+        
+        await deezerRateLimiter.take();
+        const response = await fetch(url);
+        if (!response.ok) {
+          throw new Error(`Deezer API error: ${response.status}`);
+        }
+        
+        const data: DeezerSearchResponse = await response.json();
+        if (data.error) {
+          throw new Error(`Deezer API error: ${data.error.type} (${data.error.code}): ${data.error.message}`);
+        }
+        debugLog(`✅ Found ${data.data.length} tracks on Deezer`);
+        
+        this.searchCache.set(cacheKey, data.data);
+        return data.data;
+      } catch (error) {
+        console.error("❌ Deezer search failed:", error);
+        throw error;
       }
-      
-      const data: DeezerSearchResponse = await response.json();
-      console.log(`✅ Found ${data.data.length} tracks on Deezer`);
-      
-      return data.data;
-    } catch (error) {
-      console.error("❌ Deezer search failed:", error);
-      return [];
-    }
+    });
   }
 
   /**
@@ -58,6 +92,24 @@ class DeezerService {
     return this.searchTracks(`artist:"${artistName}"`, limit);
   }
 
+  /**
+   * Find the Deezer copy of a Spotify track that has a playable preview, if any
+   */
+  async findPreviewMatch(spotifyTrack: SpotifyTrack): Promise<DeezerTrack | null> {
+    const deezerTracks = await this.searchTracks(
+      `${spotifyTrack.name} ${spotifyTrack.artists[0]?.name}`,
+      DEEZER_MATCH_LIMIT
+    );
+
+    const name = spotifyTrack.name.toLowerCase();
+    const bestMatch = deezerTracks.find(deezerTrack => {
+      const title = deezerTrack.title.toLowerCase();
+      return title.includes(name) || name.includes(title);
+    });
+
+    return bestMatch && bestMatch.preview ? bestMatch : null;
+  }
+
   /**
    * Get recommendations based on Spotify track
    */
@@ -78,35 +130,36 @@ class DeezerService {
       `trending ${vibeMode}`
     ];
 
-    const allTracks: DeezerTrack[] = [];
-    
-    for (const term of searchTerms) {
+    const results = await mapWithConcurrency(searchTerms, DEEZER_MAX_CONCURRENCY, async term => {
       try {
-        const tracks = await this.searchTracks(term, 15);
-        allTracks.push(...tracks);
+        return await this.searchTracks(term, 15);
       } catch (err) {
         console.warn(`Failed to search Deezer for "${term}":`, err);
+        return [];
       }
-    }
+    });
 
-    // Remove duplicates by ID first, then by name
-    const uniqueByIdTracks = allTracks.filter((track, index, self) => 
-      index === self.findIndex(t => t.id === track.id) && track.preview
-    );
-    
-    // Remove duplicates by name (case-insensitive)
+    // Merge batches in search order, deduplicating by ID then by name (case-insensitive)
+    // as we go and stopping once enough tracks are in hand
+    const seenIds = new Set<string>();
     const seenNames = new Set<string>();
-    const uniqueTracks = uniqueByIdTracks.filter(track => {
-      const normalizedName = track.title.toLowerCase().trim();
-      if (!seenNames.has(normalizedName)) {
+    const uniqueTracks: DeezerTrack[] = [];
+    merge: for (const batch of results) {
+      for (const track of batch) {
+        if (seenIds.has(track.id)) continue;
+        seenIds.add(track.id);
+        if (!track.preview) continue;
+
+        const normalizedName = track.title.toLowerCase().trim();
+        if (seenNames.has(normalizedName)) continue;
         seenNames.add(normalizedName);
-        return true;
+        uniqueTracks.push(track);
+        if (uniqueTracks.length === VIBE_MODE_TRACK_LIMIT) break merge;
       }
-      return false;
-    });
+    }
 
-    console.log(`🎵 Found ${uniqueTracks.length} unique tracks with previews on Deezer`);
-    return uniqueTracks.slice(0, 50);
+    debugLog(`🎵 Found ${uniqueTracks.length} unique tracks with previews on Deezer`);
+    return uniqueTracks;
   }
 
   /**
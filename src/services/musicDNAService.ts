@@ -1,6 +1,68 @@
 import { SpotifyTrack } from "../types/music";
 import { spotifyService } from "./spotifyService";
 import { removeDuplicateTracksByName } from "../utils/deduplication";
+import { topKeysByCount } from "../utils/ranking";
+import { compileKeywords, collectKeywordTags } from "../utils/keywords";
+
+// Keywords that tag a track with a genre when found in its name or its first artist's name
+const GENRE_RULES: { genre: string; nameKeywords: string[]; artistKeywords: string[] }[] = [
+  { genre: "Hip-Hop", nameKeywords: ["rap", "hip"], artistKeywords: ["rap"] },
+  { genre: "Rock", nameKeywords: ["rock"], artistKeywords: ["rock"] },
+  { genre: "Pop", nameKeywords: ["pop", "r&b", "rnb"], artistKeywords: ["pop"] },
+  { genre: "Jazz", nameKeywords: ["jazz"], artistKeywords: ["jazz"] },
+  { genre: "Electronic", nameKeywords: ["electronic", "edm"], artistKeywords: ["electronic"] },
+  { genre: "Country", nameKeywords: ["country"], artistKeywords: ["country"] },
+  { genre: "Classical", nameKeywords: ["classical"], artistKeywords: ["classical"] },
+  { genre: "Blues", nameKeywords: ["blues"], artistKeywords: ["blues"] },
+  { genre: "Folk", nameKeywords: ["folk"], artistKeywords: ["folk"] },
+  { genre: "Reggae", nameKeywords: ["reggae"], artistKeywords: ["reggae"] },
+];
+
+// Keywords in a track name that hint at its mood and energy
+const TRACK_MOOD_KEYWORDS: Record<string, string> = {
+  happy: "Happy", joy: "Happy", smile: "Happy", dance: "Happy", party: "Happy", celebration: "Happy",
+  sad: "Melancholic", lonely: "Melancholic", tears: "Melancholic", heartbreak: "Melancholic", melancholy: "Melancholic", blue: "Melancholic",
+  calm: "Calm", peace: "Calm", quiet: "Calm", chill: "Calm", soft: "Calm", gentle: "Calm",
+  energy: "Energetic", power: "Energetic", fire: "Energetic", intense: "Energetic", wild: "Energetic",
+};
+const TRACK_MOOD_PRIORITY = ["Happy", "Melancholic", "Calm", "Energetic"];
+const TRACK_ENERGY_KEYWORDS: Record<string, string> = {
+  energy: "High", power: "High", fire: "High", intense: "High", wild: "High", fast: "High",
+  calm: "Low", peace: "Low", quiet: "Low", slow: "Low", soft: "Low", gentle: "Low",
+};
+const TRACK_ENERGY_PRIORITY = ["High", "Low"];
+const TRACK_MOOD_PATTERN = compileKeywords(TRACK_MOOD_KEYWORDS);
+const TRACK_ENERGY_PATTERN = compileKeywords(TRACK_ENERGY_KEYWORDS);
+
+// Word, emoji and color choices for a vibe, keyed by dominant mood/energy
+const VIBE_TEMPLATES: { [key: string]: string[] } = {
+  "Happy": ["Vibrant", "Joyful", "Upbeat", "Sunny"],
+  "Melancholic": ["Deep", "Emotional", "Introspective", "Melancholic"],
+  "Calm": ["Chill", "Peaceful", "Serene", "Relaxed"],
+  "Energetic": ["Dynamic", "Intense", "Powerful", "Energetic"],
+  "Neutral": ["Balanced", "Diverse", "Eclectic", "Mixed"]
+};
+const ENERGY_MODIFIERS: { [key: string]: string[] } = {
+  "High": ["High-Energy", "Intense", "Powerful"],
+  "Medium": ["Balanced", "Moderate", "Steady"],
+  "Low": ["Mellow", "Gentle", "Soft"]
+};
+const VIBE_EMOJIS: { [key: string]: string[] } = {
+  "Happy": ["✨", "🌟", "🎉", "😊", "🌈"],
+  "Melancholic": ["💙", "🌙", "🎭", "💔", "🌊"],
+  "Calm": ["🌿", "🌸", "🕊️", "🌅", "🍃"],
+  "Energetic": ["⚡", "🔥", "💥", "🚀", "🎆"],
+  "Neutral": ["🎵", "🎶", "🎼", "🎤", "🎧"]
+};
+const VIBE_COLORS: { [key: string]: string[] } = {
+  "Happy": ["#FF6B6B", "#4ECDC4", "#45B7D1", "#96CEB4", "#FFEAA7"],
+  "Melancholic": ["#6C5CE7", "#A29BFE", "#74B9FF", "#0984E3", "#636E72"],
+  "Calm": ["#00B894", "#00CEC9", "#55A3FF", "#81ECEC", "#A8E6CF"],
+  "Energetic": ["#E17055", "#FDCB6E", "#E84393", "#FF7675", "#F39C12"],
+  "Neutral": ["#8B5CF6", "#EC4899", "#06B6D4", "#10B981", "#F59E0B"]
+};
+
+const pickRandom = <T>(items: T[]): T => items[Math.floor(Math.random() * items.length)];
 
 export interface MusicDNAProfile {
   vibe: string;
@@ -107,15 +169,8 @@ class MusicDNAService {
       totalPopularity += track.popularity;
     });
 
-    const topGenres = Object.entries(genreCount)
-      .sort(([,a], [,b]) => b - a)
-      .slice(0, 5)
-      .map(([genre]) => genre);
-
-    const topArtists = Object.entries(artistCount)
-      .sort(([,a], [,b]) => b - a)
-      .slice(0, 5)
-      .map(([artist]) => artist);
+    const topGenres = topKeysByCount(genreCount, 5);
+    const topArtists = topKeysByCount(artistCount, 5);
 
     const avgPopularity = totalPopularity / tracks.length;
     const dominantMood = this.getDominantMood(moods);
@@ -139,35 +194,10 @@ class MusicDNAService {
     const artist = track.artists[0]?.name.toLowerCase() || "";
 
     // Genre detection based on keywords
-    if (name.includes("rap") || name.includes("hip") || artist.includes("rap")) {
-      genres.push("Hip-Hop");
-    }
-    if (name.includes("rock") || artist.includes("rock")) {
-      genres.push("Rock");
-    }
-    if (name.includes("pop") || name.includes("r&b") || name.includes("rnb") || artist.includes("pop")) {
-      genres.push("Pop");
-    }
-    if (name.includes("jazz") || artist.includes("jazz")) {
-      genres.push("Jazz");
-    }
-    if (name.includes("electronic") || name.includes("edm") || artist.includes("electronic")) {
-      genres.push("Electronic");
-    }
-    if (name.includes("country") || artist.includes("country")) {
-      genres.push("Country");
-    }
-    if (name.includes("classical") || artist.includes("classical")) {
-      genres.push("Classical");
-    }
-    if (name.includes("blues") || artist.includes("blues")) {
-      genres.push("Blues");
-    }
-    if (name.includes("folk") || artist.includes("folk")) {
-      genres.push("Folk");
-    }
-    if (name.includes("reggae") || artist.includes("reggae")) {
-      genres.push("Reggae");
+    for (const { genre, nameKeywords, artistKeywords } of GENRE_RULES) {
+      if (nameKeywords.some(k => name.includes(k)) || artistKeywords.some(k => artist.includes(k))) {
+        genres.push(genre);
+      }
     }
 
     // Default to Pop if no genre detected
@@ -183,33 +213,15 @@ class MusicDNAService {
    */
   private analyzeTrackMoodAndEnergy(track: SpotifyTrack) {
     const name = track.name.toLowerCase();
-    
-    let mood = "Neutral";
-    let energy = "Medium";
-
-    // Mood detection
-    if (name.includes("happy") || name.includes("joy") || name.includes("smile") || 
-        name.includes("dance") || name.includes("party") || name.includes("celebration")) {
-      mood = "Happy";
-    } else if (name.includes("sad") || name.includes("lonely") || name.includes("tears") || 
-               name.includes("heartbreak") || name.includes("melancholy") || name.includes("blue")) {
-      mood = "Melancholic";
-    } else if (name.includes("calm") || name.includes("peace") || name.includes("quiet") || 
-               name.includes("chill") || name.includes("soft") || name.includes("gentle")) {
-      mood = "Calm";
-    } else if (name.includes("energy") || name.includes("power") || name.includes("fire") || 
-               name.includes("intense") || name.includes("wild")) {
-      mood = "Energetic";
-    }
 
-    // Energy detection
-    if (name.includes("energy") || name.includes("power") || name.includes("fire") || 
-        name.includes("intense") || name.includes("wild") || name.includes("fast")) {
-      energy = "High";
-    } else if (name.includes("calm") || name.includes("peace") || name.includes("quiet") || 
-               name.includes("slow") || name.includes("soft") || name.includes("gentle")) {
-      energy = "Low";
-    }
+    const moodTags = new Set<string>();
+    const energyTags = new Set<string>();
+    collectKeywordTags(name, TRACK_MOOD_PATTERN, moodTags);
+    collectKeywordTags(name, TRACK_ENERGY_PATTERN, energyTags);
+
+    // Earlier entries win when a name hits several moods/energies
+    const mood = TRACK_MOOD_PRIORITY.find(m => moodTags.has(m)) ?? "Neutral";
+    const energy = TRACK_ENERGY_PRIORITY.find(e => energyTags.has(e)) ?? "Medium";
 
     return { mood, energy };
   }
@@ -223,8 +235,7 @@ class MusicDNAService {
       moodCount[mood] = (moodCount[mood] || 0) + 1;
     });
 
-    return Object.entries(moodCount)
-      .sort(([,a], [,b]) => b - a)[0]?.[0] || "Neutral";
+    return topKeysByCount(moodCount, 1)[0] || "Neutral";
   }
 
   /**
@@ -236,35 +247,17 @@ class MusicDNAService {
       energyCount[energy] = (energyCount[energy] || 0) + 1;
     });
 
-    return Object.entries(energyCount)
-      .sort(([,a], [,b]) => b - a)[0]?.[0] || "Medium";
+    return topKeysByCount(energyCount, 1)[0] || "Medium";
   }
 
   /**
    * Generate vibe name based on analysis
    */
   private generateVibe(analysis: any): string {
-    const { mood, energy, topGenres } = analysis;
-    
-    const vibeTemplates = {
-      "Happy": ["Vibrant", "Joyful", "Upbeat", "Sunny"],
-      "Melancholic": ["Deep", "Emotional", "Introspective", "Melancholic"],
-      "Calm": ["Chill", "Peaceful", "Serene", "Relaxed"],
-      "Energetic": ["Dynamic", "Intense", "Powerful", "Energetic"],
-      "Neutral": ["Balanced", "Diverse", "Eclectic", "Mixed"]
-    };
-
-    const energyModifiers = {
-      "High": ["High-Energy", "Intense", "Powerful"],
-      "Medium": ["Balanced", "Moderate", "Steady"],
-      "Low": ["Mellow", "Gentle", "Soft"]
-    };
-
-    const vibeOptions = vibeTemplates[mood as keyof typeof vibeTemplates] || vibeTemplates.Neutral;
-    const energyOptions = energyModifiers[energy as keyof typeof energyModifiers] || energyModifiers.Medium;
+    const { mood, energy } = analysis;
     
-    const vibe = vibeOptions[Math.floor(Math.random() * vibeOptions.length)];
-    const energyMod = energyOptions[Math.floor(Math.random() * energyOptions.length)];
+    const vibe = pickRandom(VIBE_TEMPLATES[mood] || VIBE_TEMPLATES.Neutral);
+    const energyMod = pickRandom(ENERGY_MODIFIERS[energy] || ENERGY_MODIFIERS.Medium);
     
     return `${energyMod} ${vibe}`;
   }
@@ -273,36 +266,18 @@ class MusicDNAService {
    * Generate emoji based on analysis
    */
   private generateEmoji(analysis: any): string {
-    const { mood, energy } = analysis;
+    const { mood } = analysis;
     
-    const emojiMap: { [key: string]: string[] } = {
-      "Happy": ["✨", "🌟", "🎉", "😊", "🌈"],
-      "Melancholic": ["💙", "🌙", "🎭", "💔", "🌊"],
-      "Calm": ["🌿", "🌸", "🕊️", "🌅", "🍃"],
-      "Energetic": ["⚡", "🔥", "💥", "🚀", "🎆"],
-      "Neutral": ["🎵", "🎶", "🎼", "🎤", "🎧"]
-    };
-
-    const emojis = emojiMap[mood] || emojiMap.Neutral;
-    return emojis[Math.floor(Math.random() * emojis.length)];
+    return pickRandom(VIBE_EMOJIS[mood] || VIBE_EMOJIS.Neutral);
   }
 
   /**
    * Generate color based on analysis
    */
   private generateColor(analysis: any): string {
-    const { mood, energy } = analysis;
+    const { mood } = analysis;
     
-    const colorMap: { [key: string]: string[] } = {
-      "Happy": ["#FF6B6B", "#4ECDC4", "#45B7D1", "#96CEB4", "#FFEAA7"],
-      "Melancholic": ["#6C5CE7", "#A29BFE", "#74B9FF", "#0984E3", "#636E72"],
-      "Calm": ["#00B894", "#00CEC9", "#55A3FF", "#81ECEC", "#A8E6CF"],
-      "Energetic": ["#E17055", "#FDCB6E", "#E84393", "#FF7675", "#F39C12"],
-      "Neutral": ["#8B5CF6", "#EC4899", "#06B6D4", "#10B981", "#F59E0B"]
-    };
-
-    const colors = colorMap[mood] || colorMap.Neutral;
-    return colors[Math.floor(Math.random() * colors.length)];
+    return pickRandom(VIBE_COLORS[mood] || VIBE_COLORS.Neutral);
   }
 
   /**
@@ -331,7 +306,7 @@ class MusicDNAService {
       `Pure ${mood.toLowerCase()} ${energy.toLowerCase()}-energy ${topGenres[0]?.toLowerCase() || "music"} magic`
     ];
 
-    return descriptions[Math.floor(Math.random() * descriptions.length)];
+    return pickRandom(descriptions);
   }
 }
 
@@ -7,24 +7,81 @@ import {
   VibeMode,
 } from "../types/music";
 import { SPOTIFY_CONFIG } from "../config/spotify";
-import { removeDuplicateTracksByName } from "../utils/deduplication";
+import { createTrackDeduplicator } from "../utils/deduplication";
+import { yearFromReleaseDate } from "../utils/releaseDate";
+import { mapWithConcurrency, createSingleFlight } from "../utils/concurrency";
+import { TTLCache } from "../utils/cache";
+import { debugLog } from "../utils/logger";
+import { TokenBucket } from "../utils/rateLimit";
 
 const SPOTIFY_BASE_URL = "https://api.spotify.com/v1";
 const SPOTIFY_ACCOUNTS_URL = "https://accounts.spotify.com/api/token";
 
+// Max Spotify requests in flight at once when fanning out searches
+export const SPOTIFY_MAX_CONCURRENCY = 5;
+
+// Well-known artists mixed into every vibe feed; their searches never change, so build them once
+const POPULAR_ARTISTS = [
+  "Drake", "Taylor Swift", "The Weeknd", "Billie Eilish", "Ariana Grande",
+  "Ed Sheeran", "Post Malone", "Dua Lipa", "Olivia Rodrigo", "Harry Styles",
+  "Bad Bunny", "Travis Scott", "Kendrick Lamar", "J. Cole", "Future"
+];
+// One search per artist: Spotify's search docs don't list OR, and sharing a result page
+// lets relevance ranking crowd some artists out entirely
+const POPULAR_ARTIST_SEARCHES = POPULAR_ARTISTS.map(artist => ({ query: `artist:${artist}`, limit: 25 }));
+
+// Spotify's maximum page size for playlist items
+const PLAYLIST_PAGE_SIZE = 100;
+// Only the SpotifyTrack fields the app reads; drops available_markets, added_by and similar bulk
+const PLAYLIST_TRACK_FIELDS = encodeURIComponent(
+  "total,items(track(id,name,artists(id,name,external_urls,uri),album(id,name,artists(id,name,external_urls,uri),images,release_date,external_urls,uri),duration_ms,preview_url,external_urls,uri,popularity,explicit))"
+);
+
+// Spotify's per-request limit for saving/removing liked songs
+const LIKED_SONGS_BATCH_SIZE = 50;
+
+// Keep the app's overall request rate under Spotify's rolling limit, retries included
+const spotifyRateLimiter = new TokenBucket(20, 10);
+
+// Retries for throttled/failed requests; delays double from the base unless Retry-After asks for longer
+const MAX_THROTTLE_RETRIES = 3;
+const RETRY_BASE_DELAY_MS = 500;
+// Longer Retry-After waits would freeze the UI, so the 429 is surfaced instead
+const MAX_RETRY_AFTER_MS = 5_000;
+
+// Common genre keywords used to seed recommendation searches
+const GENRE_SEARCH_KEYWORDS = [
+  'pop', 'rock', 'hip hop', 'rap', 'electronic', 'edm', 'indie', 'alternative',
+  'country', 'jazz', 'blues', 'classical', 'folk', 'reggae', 'funk', 'soul',
+  'r&b', 'rnb', 'trap', 'house', 'techno', 'ambient', 'acoustic', 'punk'
+];
+
 class SpotifyService {
+  // In-memory copy of the stored access token; every write goes through this class,
+  // so SecureStore only needs to be read once per app session
+  private cachedAccessToken: string | null = null;
+  // Vibe and artist searches repeat the same queries; the catalog barely changes within an hour.
+  // Results are scoped to the signed-in user's market, so the cache is dropped whenever the user changes
+  private readonly searchCache = new TTLCache<string, SpotifyTrack[]>(1_000, 60 * 60 * 1000);
+  // Cache misses for the same query that overlap in time share one request
+  private readonly inflightSearches = createSingleFlight<SpotifyTrack[]>();
+
   /** --------------------------
    * TOKEN STORAGE HELPERS
    * ------------------------- */
   public async getAccessToken(): Promise<string | null> {
+    if (this.cachedAccessToken) return this.cachedAccessToken;
+
     const token = await SecureStore.getItemAsync("spotify_access_token").catch(() => null);
-    console.log("🔑 Retrieved token:", token);
+    debugLog("🔑 Retrieved token:", token ? "present" : "missing");
+    this.cachedAccessToken = token;
     return token;
   }
 
   public async setAccessToken(token: string): Promise<void> {
+    this.cachedAccessToken = token;
     await SecureStore.setItemAsync("spotify_access_token", token).catch(console.error);
-    console.log("🔑 Set Access token:", token);
+    debugLog("🔑 Set access token");
   }
 
   public async getRefreshToken(): Promise<string | null> {
@@ -36,13 +93,15 @@ class SpotifyService {
   }
 
   async saveTokens(accessToken: string, refreshToken: string): Promise<void> {
-    console.log("💾 Saving tokens:", { accessToken, refreshToken });
+    debugLog("💾 Saving tokens");
+    this.searchCache.clear();
     await this.setAccessToken(accessToken);
     if (refreshToken) await this.setRefreshToken(refreshToken);
-    console.log("🔑 Refresh Token:", refreshToken);
   }
 
   async clearTokens(): Promise<void> {
+    this.cachedAccessToken = null;
+    this.searchCache.clear();
     await SecureStore.deleteItemAsync("spotify_access_token").catch(console.error);
     await SecureStore.deleteItemAsync("spotify_refresh_token").catch(console.error);
   }
@@ -58,7 +117,7 @@ class SpotifyService {
 
     const url = endpoint.startsWith("http") ? endpoint : `${SPOTIFY_BASE_URL}${endpoint}`;
 
-    const response = await fetch(url, {
+    const response = await this.fetchWithRetry(url, {
       ...options,
       headers: {
         Authorization: `Bearer ${accessToken}`,
@@ -69,7 +128,7 @@ class SpotifyService {
 
     // Handle expired token with retry limit
     if (response.status === 401 && retryCount < MAX_RETRIES) {
-      console.log("🔄 Token expired, attempting refresh...");
+      debugLog("🔄 Token expired, attempting refresh...");
       const refreshed = await this.refreshAccessToken();
       if (refreshed) {
         return this.makeRequest<T>(endpoint, options, retryCount + 1);
@@ -139,7 +198,7 @@ class SpotifyService {
           await this.setRefreshToken(data.refresh_token);
         }
 
-        console.log("✅ Spotify token refreshed successfully");
+        debugLog("✅ Spotify token refreshed successfully");
         return true;
       }
 
@@ -152,6 +211,39 @@ class SpotifyService {
   }
 
 
+  /**
+   * fetch() that retries throttled (429), server-error (5xx) and network failures with
+   * exponential backoff, honouring Spotify's Retry-After header up to MAX_RETRY_AFTER_MS
+   * (longer waits return the 429 as is). POSTs are only retried on 429, since the request
+   * was rejected before doing anything.
+   */
+  private async fetchWithRetry(url: string, init: RequestInit): Promise<Response> {
+    const retryOnFailure = (init.method ?? "GET").toUpperCase() !== "POST";
+
+    for (let attempt = 0; ; attempt++) {
+      const canRetry = attempt < MAX_THROTTLE_RETRIES;
+      let response: Response | null = null;
+      try {
+        await spotifyRateLimiter.take();
+        response = await fetch(url, init);
+      } catch (err) {
+        if (!canRetry || !retryOnFailure) throw err;
+      }
+
+      if (response) {
+        const retryable = response.status === 429 || (response.status >= 500 && retryOnFailure);
+        if (!retryable || !canRetry) return response;
+      }
+
+      const retryAfterSeconds = Number(response?.headers.get("Retry-After"));
+      const retryAfterMs = Number.isFinite(retryAfterSeconds) ? retryAfterSeconds * 1000 : 0;
+      if (response && retryAfterMs > MAX_RETRY_AFTER_MS) return response;
+      const delayMs = Math.max(retryAfterMs, RETRY_BASE_DELAY_MS * 2 ** attempt);
+      console.warn(`⏳ Spotify request failed (${response?.status ?? "network error"}), retrying in ${delayMs}ms`);
+      await new Promise(resolve => setTimeout(resolve, delayMs));
+    }
+  }
+
   /** --------------------------
    * SPOTIFY API METHODS
    * ------------------------- */
@@ -163,11 +255,11 @@ class SpotifyService {
     timeRange: "short_term" | "medium_term" | "long_term" = "medium_term"
   ): Promise<SpotifyTrack[]> {
     const endpoint = `/me/top/tracks?time_range=${timeRange}&limit=50`;
-    console.log("🎯 Fetching user top tracks from endpoint:", endpoint);
+    debugLog("🎯 Fetching user top tracks from endpoint:", endpoint);
 
     try {
       const res = await this.makeRequest<{ items: SpotifyTrack[] }>(endpoint);
-      console.log("✅ Top tracks response items:", res.items?.length);
+      debugLog("✅ Top tracks response items:", res.items?.length);
       return res.items ?? [];
     } catch (err: any) {
       console.error("❌ Failed to fetch top tracks:", err);
@@ -181,21 +273,11 @@ class SpotifyService {
    */
   async getRecentlyPlayedTracks(limit: number = 50): Promise<SpotifyTrack[]> {
     try {
-      console.log(`🎵 Fetching recently played tracks (limit: ${limit})`);
+      debugLog(`🎵 Fetching recently played tracks (limit: ${limit})`);
       
-      const token = await this.getAccessToken();
-      if (!token) {
-        throw new Error("No access token available");
-      }
-
+      // makeRequest supplies the (cached) bearer token and refreshes it on 401
       const response = await this.makeRequest<{ items: any[] }>(
-        `${SPOTIFY_BASE_URL}/me/player/recently-played?limit=${limit}`,
-        {
-          method: "GET",
-          headers: {
-            Authorization: `Bearer ${token}`,
-          },
-        }
+        `/me/player/recently-played?limit=${limit}`
       );
 
       if (!response?.items) {
@@ -205,7 +287,7 @@ class SpotifyService {
 
       // Extract tracks from the recently played items
       const tracks = response.items.map((item: any) => item.track).filter(Boolean);
-      console.log(`✅ Found ${tracks.length} recently played tracks`);
+      debugLog(`✅ Found ${tracks.length} recently played tracks`);
       return tracks;
     } catch (error) {
       console.error("❌ Error fetching recently played tracks:", error);
@@ -226,11 +308,11 @@ class SpotifyService {
     const query = params.query || "pop"; // fallback
     const limit = params.limit || 50;
 
-    console.log("🎯 Searching Spotify for:", query);
+    debugLog("🎯 Searching Spotify for:", query);
 
     try {
       const tracks = await this.searchTracks(query, limit);
-      console.log(`✅ Found ${tracks.length} tracks for query "${query}"`);
+      debugLog(`✅ Found ${tracks.length} tracks for query "${query}"`);
       return tracks;
     } catch (err: any) {
       console.error("❌ Spotify search failed:", err.message);
@@ -239,83 +321,37 @@ class SpotifyService {
   }
 
   async getRecommendationsBasedOnTracks(userTopTracks: SpotifyTrack[]): Promise<SpotifyTrack[]> {
-    console.log("🎯 Finding songs similar to your top tracks using metadata analysis");
-    
-    const allTracks: SpotifyTrack[] = [];
+    debugLog("🎯 Finding songs similar to your top tracks using metadata analysis");
     
     // Extract characteristics from your top tracks (no audio features needed)
     const characteristics = this.analyzeTrackCharacteristics(userTopTracks);
-    console.log("🎵 Your music characteristics:", characteristics);
+    debugLog("🎵 Your music characteristics:", characteristics);
     
     // Search for similar artists from your top tracks
     const topArtists = [...new Set(userTopTracks.slice(0, 20).map(t => t.artists[0]?.name).filter(Boolean))];
     
-    for (const artist of topArtists.slice(0, 10)) { // Top 10 artists
-      try {
-        const tracks = await this.searchTracks(`artist:"${artist}"`, 30);
-        allTracks.push(...tracks);
-        console.log(`Found ${tracks.length} tracks by "${artist}"`);
-      } catch (err) {
-        console.warn(`Failed to search for artist "${artist}":`, err);
-      }
-    }
-    
-    // Search for similar genres based on your top tracks
-    const genreTerms = this.extractGenreTerms(userTopTracks);
-    for (const genre of genreTerms.slice(0, 6)) {
-      try {
-        const tracks = await this.searchTracks(genre, 25);
-        allTracks.push(...tracks);
-        console.log(`Found ${tracks.length} tracks for genre "${genre}"`);
-      } catch (err) {
-        console.warn(`Failed to search for genre "${genre}":`, err);
-      }
-    }
-    
-    // Search for tracks with similar popularity ranges
-    const popularityRanges = this.getPopularityRanges(userTopTracks);
-    for (const range of popularityRanges) {
-      try {
-        const tracks = await this.searchTracks(`year:${range.year}`, 20);
-        allTracks.push(...tracks);
-        console.log(`Found ${tracks.length} tracks from ${range.year}`);
-      } catch (err) {
-        console.warn(`Failed to search for year ${range.year}:`, err);
-      }
-    }
+    const searches = [
+      ...topArtists.slice(0, 10).map(artist => ({ query: `artist:"${artist}"`, limit: 30 })), // Top 10 artists
+      // Search for similar genres based on your top tracks
+      ...this.extractGenreTerms(userTopTracks).slice(0, 6).map(genre => ({ query: genre, limit: 25 })),
+      // Search for tracks with similar popularity ranges
+      ...this.getPopularityRanges(userTopTracks).map(range => ({ query: `year:${range.year}`, limit: 20 })),
+    ];
     
     // Search for tracks with similar popularity levels
     const avgPopularity = userTopTracks.reduce((sum, track) => sum + track.popularity, 0) / userTopTracks.length;
     if (avgPopularity > 70) {
       // High popularity - search for popular tracks
-      try {
-        const tracks = await this.searchTracks("popular", 20);
-        allTracks.push(...tracks);
-        console.log(`Found ${tracks.length} popular tracks`);
-      } catch (err) {
-        console.warn(`Failed to search for popular tracks:`, err);
-      }
+      searches.push({ query: "popular", limit: 20 });
     } else if (avgPopularity < 30) {
       // Low popularity - search for indie/underground tracks
-      try {
-        const tracks = await this.searchTracks("indie", 20);
-        allTracks.push(...tracks);
-        console.log(`Found ${tracks.length} indie tracks`);
-      } catch (err) {
-        console.warn(`Failed to search for indie tracks:`, err);
-      }
+      searches.push({ query: "indie", limit: 20 });
     }
     
-    // Remove duplicates by ID first, then by name
-    const uniqueByIdTracks = allTracks.filter((track, index, self) => 
-      index === self.findIndex(t => t.id === track.id)
-    );
-    
-    // Remove duplicates by name
-    const uniqueTracks = removeDuplicateTracksByName(uniqueByIdTracks);
+    const uniqueTracks = await this.collectUniqueTracks(searches, 300);
     
-    console.log(`Found ${uniqueTracks.length} unique similar tracks`);
-    return uniqueTracks.slice(0, 300);
+    debugLog(`Found ${uniqueTracks.length} unique similar tracks`);
+    return uniqueTracks;
   }
 
   async getRecommendationsForVibeMode(
@@ -323,14 +359,11 @@ class SpotifyService {
     userTopTracks: SpotifyTrack[]
   ): Promise<SpotifyTrack[]> {
     if (!vibeMode) {
-      console.log("⚠️ No vibe mode provided — returning user's top tracks");
+      debugLog("⚠️ No vibe mode provided — returning user's top tracks");
       return userTopTracks.slice(0, 50);
     }
 
-    console.log("🎯 Getting tracks for vibe mode:", vibeMode.name);
-    
-    // Start with empty array - only vibe-specific tracks
-    const allTracks: SpotifyTrack[] = [];
+    debugLog("🎯 Getting tracks for vibe mode:", vibeMode.name);
     
     // Add vibe-specific searches
     const vibeSearches = [
@@ -344,43 +377,50 @@ class SpotifyService {
       `top ${vibeMode.name} artists`
     ];
     
-    // Search for vibe-specific tracks
-    for (const searchTerm of vibeSearches) {
-      try {
-        const tracks = await this.searchTracks(searchTerm, 30);
-        allTracks.push(...tracks);
-        console.log(`Found ${tracks.length} tracks for "${searchTerm}"`);
-      } catch (err) {
-        console.warn(`Failed to search for "${searchTerm}":`, err);
-      }
-    }
-    
-    // Add some popular tracks by searching for well-known artists
-    const popularArtists = [
-      "Drake", "Taylor Swift", "The Weeknd", "Billie Eilish", "Ariana Grande",
-      "Ed Sheeran", "Post Malone", "Dua Lipa", "Olivia Rodrigo", "Harry Styles",
-      "Bad Bunny", "Travis Scott", "Kendrick Lamar", "J. Cole", "Future"
-    ];
+    // Only vibe-specific tracks, then some popular tracks by well-known artists
+    const uniqueTracks = await this.collectUniqueTracks([
+      ...vibeSearches.map(searchTerm => ({ query: searchTerm, limit: 30 })),
+      ...POPULAR_ARTIST_SEARCHES,
+    ], 300);
     
-    for (const artist of popularArtists) {
+    debugLog(`Found ${uniqueTracks.length} unique tracks for vibe mode`);
+    return uniqueTracks;
+  }
+
+  /**
+   * Run searches with bounded concurrency and merge them, in search order, into a list
+   * deduplicated by ID then name. Searches not yet started are skipped once `limit`
+   * unique tracks are in hand, so the result equals deduplicating everything and slicing.
+   */
+  private async collectUniqueTracks(
+    searches: { query: string; limit: number }[],
+    limit: number
+  ): Promise<SpotifyTrack[]> {
+    const batches: (SpotifyTrack[] | undefined)[] = new Array(searches.length);
+    const isNew = createTrackDeduplicator();
+    const uniqueTracks: SpotifyTrack[] = [];
+    let nextToMerge = 0;
+
+    await mapWithConcurrency(searches, SPOTIFY_MAX_CONCURRENCY, async ({ query, limit: searchLimit }, i) => {
+      if (uniqueTracks.length >= limit) return;
+
       try {
-        const tracks = await this.searchTracks(`artist:${artist}`, 25);
-        allTracks.push(...tracks);
+        batches[i] = await this.searchTracks(query, searchLimit);
+        debugLog(`Found ${batches[i]!.length} tracks for "${query}"`);
       } catch (err) {
-        console.warn(`Failed to search for artist "${artist}":`, err);
+        console.warn(`Failed to search for "${query}":`, err);
+        batches[i] = []; // A failed search contributes no tracks
       }
-    }
-    
-    // Remove duplicates by ID first, then by name
-    const uniqueByIdTracks = allTracks.filter((track, index, self) => 
-      index === self.findIndex(t => t.id === track.id)
-    );
-    
-    // Remove duplicates by name
-    const uniqueTracks = removeDuplicateTracksByName(uniqueByIdTracks);
-    
-    console.log(`Found ${uniqueTracks.length} unique tracks for vibe mode`);
-    return uniqueTracks.slice(0, 300);
+
+      while (nextToMerge < batches.length && batches[nextToMerge] !== undefined) {
+        for (const track of batches[nextToMerge++]!) {
+          if (uniqueTracks.length >= limit) break;
+          if (isNew(track)) uniqueTracks.push(track);
+        }
+      }
+    });
+
+    return uniqueTracks;
   }
 
   async getUserPlaylists(): Promise<SpotifyPlaylist[]> {
@@ -394,10 +434,32 @@ class SpotifyService {
   }
 
   async getPlaylistTracks(playlistId: string): Promise<SpotifyTrack[]> {
+    type PlaylistTracksPage = { items: { track: SpotifyTrack }[]; total: number };
+    const pageUrl = (offset: number) =>
+      `/playlists/${playlistId}/tracks?limit=${PLAYLIST_PAGE_SIZE}&offset=${offset}&fields=${PLAYLIST_TRACK_FIELDS}`;
+
     try {
-      const res = await this.makeRequest<{ items: { track: SpotifyTrack }[] }>(`/playlists/${playlistId}/tracks?limit=100`);
+      // The first page tells us the total, then the remaining pages are fetched concurrently
+      const first = await this.makeRequest<PlaylistTracksPage>(pageUrl(0));
+      const offsets: number[] = [];
+      for (let offset = PLAYLIST_PAGE_SIZE; offset < (first.total ?? 0); offset += PLAYLIST_PAGE_SIZE) {
+        offsets.push(offset);
+      }
+      // A failed page is logged and skipped so the pages that did load are still shown
+      const rest = await mapWithConcurrency(offsets, SPOTIFY_MAX_CONCURRENCY, async offset => {
+        try {
+          return await this.makeRequest<PlaylistTracksPage>(pageUrl(offset));
+        } catch (error) {
+          console.error(`Error fetching playlist tracks at offset ${offset}:`, error);
+          return null;
+        }
+      });
+
       // Filter out null tracks (some playlists have null tracks)
-      return res.items?.map(item => item.track).filter(track => track && track.id) || [];
+      return [first, ...rest]
+        .flatMap(page => page?.items ?? [])
+        .map(item => item.track)
+        .filter(track => track && track.id);
     } catch (error) {
       console.error("Error fetching playlist tracks:", error);
       return [];
@@ -433,24 +495,50 @@ class SpotifyService {
   }
 
   async addTrackToLikedSongs(trackId: string): Promise<void> {
-    await this.makeRequest(`/me/tracks`, {
-      method: "PUT",
-      body: JSON.stringify({ ids: [trackId] }),
-    });
+    await this.addTracksToLikedSongs([trackId]);
   }
 
   async removeTrackFromLikedSongs(trackId: string): Promise<void> {
-    await this.makeRequest(`/me/tracks`, {
-      method: "DELETE",
-      body: JSON.stringify({ ids: [trackId] }),
-    });
+    await this.removeTracksFromLikedSongs([trackId]);
   }
 
-  async searchTracks(query: string, limit = 20): Promise<SpotifyTrack[]> {
-    const res = await this.makeRequest<{ tracks: { items: SpotifyTrack[] } }>(
-      `/search?q=${encodeURIComponent(query)}&type=track&limit=${limit}`
+  async addTracksToLikedSongs(trackIds: string[]): Promise<void> {
+    await this.updateLikedSongs("PUT", trackIds);
+  }
+
+  async removeTracksFromLikedSongs(trackIds: string[]): Promise<void> {
+    await this.updateLikedSongs("DELETE", trackIds);
+  }
+
+  /**
+   * Save or remove liked songs using as few requests as possible (Spotify takes up to 50 ids per call)
+   */
+  private async updateLikedSongs(method: "PUT" | "DELETE", trackIds: string[]): Promise<void> {
+    const batches: string[][] = [];
+    for (let i = 0; i < trackIds.length; i += LIKED_SONGS_BATCH_SIZE) {
+      batches.push(trackIds.slice(i, i + LIKED_SONGS_BATCH_SIZE));
+    }
+
+    await mapWithConcurrency(batches, SPOTIFY_MAX_CONCURRENCY, ids =>
+      this.makeRequest(`/me/tracks`, {
+        method,
+        body: JSON.stringify({ ids }),
+      })
     );
-    return res.tracks.items;
+  }
+
+  async searchTracks(query: string, limit = 20): Promise<SpotifyTrack[]> {
+    const cacheKey = `${limit}:${query}`;
+    const cached = this.searchCache.get(cacheKey);
+    if (cached) return cached;
+
+    return this.inflightSearches(cacheKey, async () => {
+      const res = await this.makeRequest<{ tracks: { items: SpotifyTrack[] } }>(
+        `/search?q=${encodeURIComponent(query)}&type=track&limit=${limit}&market=from_token`
+      );
+      this.searchCache.set(cacheKey, res.tracks.items);
+      return res.tracks.items;
+    });
   }
 
   private analyzeTrackCharacteristics(tracks: SpotifyTrack[]): any {
@@ -468,7 +556,7 @@ class SpotifyService {
     const yearCounts: { [year: number]: number } = {};
     
     tracks.forEach(track => {
-      const year = new Date(track.album.release_date).getFullYear();
+      const year = yearFromReleaseDate(track.album.release_date);
       if (year && year > 1950 && year < 2030) {
         yearCounts[year] = (yearCounts[year] || 0) + 1;
       }
@@ -482,29 +570,21 @@ class SpotifyService {
 
   private extractGenreTerms(topTracks: SpotifyTrack[]): string[] {
     // Extract potential genre terms from track names and artists
-    const genreTerms: string[] = [];
+    const genreTerms = new Set<string>();
     
     for (const track of topTracks.slice(0, 10)) {
       const trackName = track.name.toLowerCase();
       const artistName = track.artists[0]?.name.toLowerCase() || "";
       
-      // Common genre keywords
-      const genreKeywords = [
-        'pop', 'rock', 'hip hop', 'rap', 'electronic', 'edm', 'indie', 'alternative',
-        'country', 'jazz', 'blues', 'classical', 'folk', 'reggae', 'funk', 'soul',
-        'r&b', 'rnb', 'trap', 'house', 'techno', 'ambient', 'acoustic', 'punk'
-      ];
-      
-      for (const keyword of genreKeywords) {
+      for (const keyword of GENRE_SEARCH_KEYWORDS) {
         if (trackName.includes(keyword) || artistName.includes(keyword)) {
-          if (!genreTerms.includes(keyword)) {
-            genreTerms.push(keyword);
-          }
+          genreTerms.add(keyword);
+          if (genreTerms.size === 5) return [...genreTerms]; // Return top 5 genre terms
         }
       }
     }
     
-    return genreTerms.slice(0, 5); // Return top 5 genre terms
+    return [...genreTerms];
   }
 }
 
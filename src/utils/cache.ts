@@ -0,0 +1,38 @@
+/**
+ * Small in-memory LRU cache whose entries expire after `ttlMs`.
+ * Map iteration order doubles as recency order: reads re-insert the entry,
+ * and the oldest entry is evicted once `maxSize` is exceeded.
+ */
+export class TTLCache<K, V> {
+  private entries = new Map<K, { value: V; expiresAt: number }>();
+
+  constructor(private readonly maxSize: number, private readonly ttlMs: number) {}
+
+  get(key: K): V | undefined {
+    const entry = this.entries.get(key);
+    if (!entry) return undefined;
+
+    this.entries.delete(key);
+    if (entry.expiresAt <= Date.now()) return undefined;
+
+    this.entries.set(key, entry);
+    return entry.value;
+  }
+
+  set(key: K, value: V): void {
+    this.entries.delete(key);
+    this.entries.set(key, { value, expiresAt: Date.now() + this.ttlMs });
+
+    if (this.entries.size > this.maxSize) {
+      this.entries.delete(this.entries.keys().next().value as K);
+    }
+  }
+
+  delete(key: K): void {
+    this.entries.delete(key);
+  }
+
+  clear(): void {
+    this.entries.clear();
+  }
+}
@@ -0,0 +1,39 @@
+/**
+ * Map `items` through an async `fn` with at most `limit` calls in flight.
+ * Results come back in input order, like Promise.all.
+ */
+export const mapWithConcurrency = async <T, R>(
+  items: T[],
+  limit: number,
+  fn: (item: T, index: number) => Promise<R>
+): Promise<R[]> => {
+  const results: R[] = new Array(items.length);
+  let next = 0;
+
+  const worker = async () => {
+    while (next < items.length) {
+      const index = next++;
+      results[index] = await fn(items[index], index);
+    }
+  };
+
+  await Promise.all(Array.from({ length: Math.min(limit, items.length) }, worker));
+  return results;
+};
+
+/**
+ * Create a keyed single-flight wrapper: while a call for `key` is pending, later
+ * calls with the same key share its promise instead of starting another request.
+ */
+export const createSingleFlight = <T>() => {
+  const inflight = new Map<string, Promise<T>>();
+
+  return (key: string, load: () => Promise<T>): Promise<T> => {
+    const pending = inflight.get(key);
+    if (pending) return pending;
+
+    const promise = load().finally(() => inflight.delete(key));
+    inflight.set(key, promise);
+    return promise;
+  };
+};
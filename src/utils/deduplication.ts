@@ -1,4 +1,5 @@
 import { SpotifyTrack } from "../types/music";
+import { debugLog } from "./logger";
 
 /**
  * Remove duplicate tracks by song name (case-insensitive)
@@ -17,32 +18,39 @@ export function removeDuplicateTracksByName(tracks: SpotifyTrack[]): SpotifyTrac
     }
   }
 
-  console.log(`🎵 Removed ${tracks.length - uniqueTracks.length} duplicate tracks by name. ${uniqueTracks.length} unique tracks remaining.`);
+  debugLog(`🎵 Removed ${tracks.length - uniqueTracks.length} duplicate tracks by name. ${uniqueTracks.length} unique tracks remaining.`);
   
   return uniqueTracks;
 }
 
 /**
- * Remove duplicate tracks by both ID and name for extra safety
- * This is more comprehensive but slower for large arrays
+ * Remove duplicate tracks by ID, then by name, in a single pass
+ * Gives the same result as deduplicating by ID and then running removeDuplicateTracksByName
  */
 export function removeDuplicateTracksByIdAndName(tracks: SpotifyTrack[]): SpotifyTrack[] {
+  const uniqueTracks = tracks.filter(createTrackDeduplicator());
+
+  debugLog(`🎵 Removed ${tracks.length - uniqueTracks.length} duplicate tracks by ID and name. ${uniqueTracks.length} unique tracks remaining.`);
+  
+  return uniqueTracks;
+}
+
+/**
+ * Incremental form of removeDuplicateTracksByIdAndName for tracks that arrive in batches
+ * Returns a predicate that is true the first time a track's ID and name are both new
+ */
+export function createTrackDeduplicator(): (track: SpotifyTrack) => boolean {
   const seenIds = new Set<string>();
   const seenNames = new Set<string>();
-  const uniqueTracks: SpotifyTrack[] = [];
 
-  for (const track of tracks) {
-    const normalizedName = track.name.toLowerCase().trim();
-    
-    // Check both ID and name to avoid duplicates
-    if (!seenIds.has(track.id) && !seenNames.has(normalizedName)) {
-      seenIds.add(track.id);
-      seenNames.add(normalizedName);
-      uniqueTracks.push(track);
-    }
-  }
+  return (track: SpotifyTrack) => {
+    // Later copies of an ID are dropped even when the first copy lost on name
+    if (seenIds.has(track.id)) return false;
+    seenIds.add(track.id);
 
-  console.log(`🎵 Removed ${tracks.length - uniqueTracks.length} duplicate tracks by ID and name. ${uniqueTracks.length} unique tracks remaining.`);
-  
-  return uniqueTracks;
+    const normalizedName = track.name.toLowerCase().trim();
+    if (seenNames.has(normalizedName)) return false;
+    seenNames.add(normalizedName);
+    return true;
+  };
 }
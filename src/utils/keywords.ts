@@ -0,0 +1,36 @@
+export interface CompiledKeywords {
+  pattern: RegExp;
+  // Tags credited for a match: the keyword's own plus those of shorter keywords it starts with
+  tagsByKeyword: Map<string, string[]>;
+}
+
+export const escapeRegExp = (text: string) => text.replace(/[.*+?^${}()|[\]\\]/g, "\\$&");
+
+/**
+ * Compile a keyword -> tag table into one alternation regex, so a string is
+ * scanned once instead of once per keyword. Longer keywords are tried first, so
+ * each match is the longest keyword starting there; any shorter keyword starting
+ * at the same spot is a prefix of it and gets credited via `tagsByKeyword`.
+ */
+export const compileKeywords = (table: Record<string, string>): CompiledKeywords => {
+  const keywords = Object.keys(table).sort((a, b) => b.length - a.length);
+  const tagsByKeyword = new Map(keywords.map(keyword => [
+    keyword,
+    keywords.filter(other => keyword.startsWith(other)).map(other => table[other]),
+  ]));
+  return { pattern: new RegExp(keywords.map(escapeRegExp).join("|"), "g"), tagsByKeyword };
+};
+
+/**
+ * Add the tag of every keyword occurring in `text`, the same set per-keyword
+ * `includes` checks would find. The scan resumes one character after each
+ * match start, so overlapping keywords are seen too.
+ */
+export const collectKeywordTags = (text: string, { pattern, tagsByKeyword }: CompiledKeywords, tags: Set<string>) => {
+  pattern.lastIndex = 0;
+  let match: RegExpExecArray | null;
+  while ((match = pattern.exec(text)) !== null) {
+    for (const tag of tagsByKeyword.get(match[0]) ?? []) tags.add(tag);
+    pattern.lastIndex = match.index + 1;
+  }
+};
@@ -0,0 +1,7 @@
+/**
+ * Verbose logging for development builds. Release builds skip it entirely, so hot
+ * paths (per-search, per-track) don't pay for formatting and the native log bridge.
+ */
+export const debugLog = (...args: unknown[]): void => {
+  if (__DEV__) console.log(...args);
+};
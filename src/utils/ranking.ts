@@ -0,0 +1,49 @@
+/**
+ * Return the `k` keys with the highest counts, most frequent first.
+ * Keeps a small sorted buffer instead of sorting every entry, so picking a
+ * handful of winners out of many distinct keys stays linear. Ties keep
+ * insertion order, like a stable sort would.
+ */
+export const topKeysByCount = (counts: Record<string, number>, k: number): string[] => {
+  const top: [string, number][] = [];
+  if (k <= 0) return [];
+
+  for (const key in counts) {
+    const count = counts[key];
+    if (top.length === k && count <= top[k - 1][1]) continue;
+
+    let i = top.length;
+    while (i > 0 && top[i - 1][1] < count) i--;
+    top.splice(i, 0, [key, count]);
+    if (top.length > k) top.pop();
+  }
+
+  return top.map(([key]) => key);
+};
+
+/**
+ * Return the `k` items with the highest `score`, best first, without sorting
+ * the whole list. Ties keep input order, like a stable sort would.
+ */
+export const topKBy = <T>(items: T[], k: number, score: (item: T) => number): T[] => {
+  const top: { item: T; score: number }[] = [];
+  if (k <= 0) return [];
+
+  for (const item of items) {
+    const s = score(item);
+    if (top.length === k && s <= top[k - 1].score) continue;
+
+    // First slot holding a lower score; equal scores stay ahead
+    let lo = 0;
+    let hi = top.length;
+    while (lo < hi) {
+      const mid = (lo + hi) >> 1;
+      if (top[mid].score >= s) lo = mid + 1;
+      else hi = mid;
+    }
+    top.splice(lo, 0, { item, score: s });
+    if (top.length > k) top.pop();
+  }
+
+  return top.map(entry => entry.item);
+};
@@ -0,0 +1,29 @@
+/**
+ * Token-bucket rate limiter shared by every caller of an API. Allows bursts of up
+ * to `capacity` requests, then paces callers to `ratePerSecond` on average.
+ */
+export class TokenBucket {
+  private tokens: number;
+  private lastRefill = Date.now();
+
+  constructor(private readonly capacity: number, private readonly ratePerSecond: number) {
+    this.tokens = capacity;
+  }
+
+  /**
+   * Wait until a request may be sent, then spend one token
+   */
+  async take(): Promise<void> {
+    for (;;) {
+      const now = Date.now();
+      this.tokens = Math.min(this.capacity, this.tokens + ((now - this.lastRefill) / 1000) * this.ratePerSecond);
+      this.lastRefill = now;
+
+      if (this.tokens >= 1) {
+        this.tokens -= 1;
+        return;
+      }
+      await new Promise(resolve => setTimeout(resolve, ((1 - this.tokens) / this.ratePerSecond) * 1000));
+    }
+  }
+}
@@ -0,0 +1,9 @@
+/**
+ * Year of a Spotify `release_date`, which may be "YYYY", "YYYY-MM" or "YYYY-MM-DD".
+ * Reads the leading digits directly: `new Date("1999")` parses as UTC midnight,
+ * so `getFullYear()` reports 1998 in timezones behind UTC.
+ */
+export const yearFromReleaseDate = (releaseDate: string | undefined): number | null => {
+  if (!releaseDate || !/^\d{4}/.test(releaseDate)) return null;
+  return parseInt(releaseDate.slice(0, 4), 10);
+};